@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+import sys
+import argparse, re
+import os
+import json
+import time
+import random
+import datetime
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from contextlib import redirect_stdout, redirect_stderr
+
+# directory of penntools.py and penn-coding.py
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# vocabulary for synthetic trees: tag -> list of (form, lemma)
+vocab = {
+  'mcvf': {
+    'verb': ['VJ', 'VJ', 'VX', 'VPP', 'VX', 'VJ'],
+    'modal': ['MDJ'],
+    'verbs': [('dist', 'dire'), ('vit', 'veoir'), ('prent', 'prendre'), ('fist', 'faire'), ('ala', 'aler'), ('dona', 'doner'),
+              ('ot', 'avoir'), ('est', 'estre'), ('manda', 'mander'), ('respont', 'respondre'), ('tient', 'tenir'), ('vint', 'venir')],
+    'modals': [('pot', 'pooir'), ('volt', 'vouloir'), ('doit', 'devoir')],
+    'N': [('rei', 'roi'), ('chose', 'chose'), ('terre', 'terre'), ('cheval', 'cheval'), ('espee', 'espee'), ('cuer', 'cuer')],
+    'D': [('li', 'le'), ('la', 'le'), ('le', 'le'), ('un', 'un'), ('sa', 'son')],
+    'PRO': [('il', 'il'), ('je', 'je'), ('nos', 'nous'), ('ele', 'il')],
+    'CL': [('le', 'le'), ('se', 'se'), ('li', 'lui')],
+    'P': [('a', 'a'), ('de', 'de'), ('en', 'en'), ('par', 'par')],
+    'ADV': [('molt', 'molt'), ('puis', 'puis'), ('or', 'or'), ('si', 'si')],
+    'CONJ': [('et', 'et')],
+    'NEG': [('ne', 'ne')],
+    'tags': {'VJ': 'VERcjg', 'VX': 'VERinf', 'VPP': 'VERppe', 'MDJ': 'VERcjg', 'N': 'NOMcom', 'D': 'DETdef', 'PRO': 'PROper',
+             'CL': 'PROper', 'P': 'PRE', 'ADV': 'ADVgen', 'CONJ': 'CONcoo', 'NEG': 'ADVneg', '.': 'PONfrt', ',': 'PONfbl'},
+    'text': '1100-ROLAND-V', 'year': '1100',
+  },
+  'me': {
+    'verb': ['VBD', 'VBP', 'VB', 'VAN', 'VBN', 'VBD'],
+    'modal': ['MD'],
+    'verbs': [('seyde', 'seien'), ('saw', 'sen'), ('toke', 'taken'), ('made', 'maken'), ('wente', 'wenden'), ('yaf', 'yeven'),
+              ('hadde', 'haven'), ('was', 'ben'), ('sente', 'senden'), ('answerde', 'answeren'), ('helde', 'holden'), ('cam', 'comen')],
+    'modals': [('myght', 'mouen'), ('wolde', 'willen'), ('shal', 'shulen')],
+    'N': [('kyng', 'king'), ('thyng', 'thing'), ('lond', 'lond'), ('hors', 'hors'), ('swerd', 'swerd'), ('herte', 'herte')],
+    'D': [('the', 'the'), ('a', 'a'), ('that', 'that'), ('his', 'his')],
+    'PRO': [('he', 'he'), ('I', 'I'), ('we', 'we'), ('she', 'she')],
+    'CL': [('hym', 'he'), ('hit', 'it'), ('hem', 'they')],
+    'P': [('to', 'to'), ('of', 'of'), ('in', 'in'), ('by', 'by')],
+    'ADV': [('ful', 'ful'), ('thanne', 'thanne'), ('now', 'now'), ('so', 'so')],
+    'CONJ': [('and', 'and')],
+    'NEG': [('ne', 'ne')],
+    'tags': {},
+    'text': 'CMMALORY', 'year': '1470',
+  },
+}
+
+codingAttributes = ['ipHead', 'clit', 'subj', 'dobj', 'iobj', 'pobj', 'ipobj', 'cpobj', 'spc', 'aux', 'reflself', 'reflclit', 'neg', 'year']
+
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        prog = "penn-bench.py",
+        description = '''
+Benchmarks for the hot paths of penntools.py and penn-coding.py on synthetic Penn trees.
+Results are written as JSON, runs can be compared with --compare.
+
+Examples:
+- Run all benchmarks at three corpus sizes (sentences):
+    > %(prog)s -s 100,1000,10000 -o bench-new.json
+- Compare with an earlier run:
+    > %(prog)s -s 100,1000,10000 -o bench-new.json --compare bench-old.json
+- Only write a synthetic corpus (psd, cod or MED lemma list):
+    > %(prog)s --generate synthetic.psd -s 1000 -a rnn
+- Regression checks (exit status 1 if one fails):
+    > %(prog)s --check
+''',
+        formatter_class = argparse.RawTextHelpFormatter
+        )
+    parser.add_argument(
+        '-s', '--sizes', default = "100,1000", type = str,
+        help='corpus sizes (number of sentences), comma-separated')
+    parser.add_argument(
+        '-b', '--bench', default = "", type = str,
+        help='run only these benchmarks (comma-separated names, see -B)')
+    parser.add_argument(
+        '-B', '--list', action='store_true',
+        help='list the benchmark names')
+    parser.add_argument(
+        '-C', '--corpus', default = "mcvf", type = str, choices = sorted(vocab.keys()),
+        help='vocabulary and tag set of the synthetic corpus')
+    parser.add_argument(
+        '-d', '--depth', default = 3, type = int,
+        help='maximal depth of embedded IPs')
+    parser.add_argument(
+        '-w', '--words', default = 12, type = int,
+        help='average sentence length (terminal nodes)')
+    parser.add_argument(
+        '-a', '--annotation', default = "rnn", type = str, choices = ['none', 'l', 'rnn', 'both'],
+        help='lemma annotation of terminals: none, @l=, @rl=@rt= (rnn), or both')
+    parser.add_argument(
+        '-r', '--repeat', default = 3, type = int,
+        help='repeat each benchmark, keep the fastest run')
+    parser.add_argument(
+        '--seed', default = 1, type = int,
+        help='random seed for the corpus generator')
+    parser.add_argument(
+        '-o', '--output', default = "", type = str,
+        help='write results to this JSON file')
+    parser.add_argument(
+        '--compare', default = "", type = str,
+        help='compare results with this JSON file of an earlier run')
+    parser.add_argument(
+        '--generate', default = "", type = str,
+        help='write a synthetic corpus to this file and exit (.psd, .cod or .html for MED lemmas)')
+    parser.add_argument(
+        '--check', action='store_true',
+        help='run the regression checks on synthetic trees and exit')
+    return parser.parse_args()
+
+#----------------------------------------------------------------------
+# synthetic corpus
+#----------------------------------------------------------------------
+
+# random terminal node (tag, form, lemma) of a word class
+def makeTerminal(rnd, voc, wordClass):
+    if wordClass == 'verb':
+        form, lemma = rnd.choice(voc['verbs'])
+        return (rnd.choice(voc['verb']), form, lemma)
+    if wordClass == 'modal':
+        form, lemma = rnd.choice(voc['modals'])
+        return (rnd.choice(voc['modal']), form, lemma)
+    form, lemma = rnd.choice(voc[wordClass])
+    return (wordClass, form, lemma)
+
+# string of a terminal node with the requested annotation
+def annotate(rnd, voc, terminal, annotation, unknown):
+    tag, form, lemma = terminal
+    if unknown:
+        lemma = 'NA'
+    rt = voc['tags'].get(tag, tag)
+    if annotation == 'l':
+        return '(%s %s@l=%s)' % (tag, form, lemma)
+    if annotation == 'rnn':
+        return '(%s %s@rl=%s@rt=%s)' % (tag, form, lemma, rt)
+    if annotation == 'both':
+        if rnd.random() < 0.1:   # some nodes only with RNN annotation, for repair()
+            return '(%s %s@rl=%s@rt=%s)' % (tag, form, lemma, rt)
+        return '(%s %s@l=%s@t=%s@rl=%s@rt=%s)' % (tag, form, lemma, rt, lemma, rt)
+    return '(%s %s)' % (tag, form)
+
+# nested list: [label, child, child, ...], terminals are tuples
+def makeIP(rnd, voc, label, depth, opts, budget):
+    ip = [label]
+    if opts['coding']:
+        values = [rnd.choice(['verb', 'MOD', 'BE', 'HAVE']), str(rnd.randint(0, 2)), rnd.choice(['lex', 'pro', 'null']),
+                  rnd.choice(['lex', 'pro', 'clit', '0']), rnd.choice(['lex', 'pro', '0']), rnd.choice(['lex', '0']),
+                  rnd.choice(['inf', 'sub', '0']), rnd.choice(['rel', 'tht', '0']), '0', rnd.choice(['etre', 'avoir', '0']),
+                  '0', rnd.choice(['acc', 'dtv', '0']), rnd.choice(['0', '1']), voc['year']]
+        ip.append(('CODING-' + label, ':'.join(a + '=' + v for a, v in zip(codingAttributes, values)), None))
+    ip.append(['NP-SBJ', makeTerminal(rnd, voc, 'PRO')])
+    if rnd.random() < 0.2:
+        ip.append(makeTerminal(rnd, voc, 'NEG'))
+    if rnd.random() < 0.3:
+        ip.append(makeTerminal(rnd, voc, 'CL'))
+    if rnd.random() < 0.3:
+        ip.append(makeTerminal(rnd, voc, 'modal'))
+    ip.append(makeTerminal(rnd, voc, 'verb'))
+    budget -= 3
+    while budget > 0:
+        r = rnd.random()
+        if r < 0.35:
+            ip.append(['NP-ACC', makeTerminal(rnd, voc, 'D'), makeTerminal(rnd, voc, 'N')])
+            budget -= 2
+        elif r < 0.6:
+            ip.append(['PP', makeTerminal(rnd, voc, 'P'), ['NP', makeTerminal(rnd, voc, 'D'), makeTerminal(rnd, voc, 'N')]])
+            budget -= 3
+        elif r < 0.75:
+            ip.append(makeTerminal(rnd, voc, 'ADV'))
+            budget -= 1
+        elif depth > 1:
+            sub = rnd.choice(['IP-SUB', 'IP-INF', 'IP-MAT'])
+            if sub == 'IP-MAT':   # coordinated clause
+                ip.append(makeTerminal(rnd, voc, 'CONJ'))
+            share = rnd.randint(3, max(3, budget))
+            ip.append(makeIP(rnd, voc, sub, depth - 1, opts, share))
+            budget -= share
+        else:
+            ip.append(makeTerminal(rnd, voc, 'ADV'))
+            budget -= 1
+    return ip
+
+# render nested lists in Penn format with indentation
+def renderTree(rnd, voc, node, opts, indent, terminals):
+    if isinstance(node, tuple):
+        if node[2] is None:   # CODING node
+            return '(%s %s)' % (node[0], node[1])
+        unknown = node[0][0] == 'V' and rnd.random() < opts['unknown']
+        terminals.append((node, unknown))
+        return annotate(rnd, voc, node, opts['annotation'], unknown)
+    label = node[0]
+    pad = ' ' * (indent + len(label) + 2)
+    children = [renderTree(rnd, voc, c, opts, indent + len(label) + 2, terminals) for c in node[1:]]
+    out = '(' + label + ' ' + children[0]
+    for c in children[1:]:
+        out += '\n' + pad + c
+    return out + ')'
+
+# generator: records of a synthetic corpus, format 'psd' or 'cod'
+def makeCorpus(nSentences, corpus='mcvf', depth=3, words=12, annotation='rnn', form='psd', unknown=0.05, seed=1):
+    rnd = random.Random(seed)
+    voc = vocab[corpus]
+    opts = {'annotation': annotation, 'coding': form == 'cod', 'unknown': unknown}
+    for n in range(1, nSentences + 1):
+        id = '%s,%d.%d' % (voc['text'], n // 100 + 1, n)
+        terminals = []
+        ip = makeIP(rnd, voc, 'IP-MAT', depth, opts, max(3, int(rnd.gauss(words, words / 3))))
+        ip.append(('.', '.', '.'))
+        tree = '( ' + renderTree(rnd, voc, ip, opts, 2, terminals) + '\n  (ID ' + id + '))'
+        if form == 'cod':
+            readable = ' '.join(annotate(rnd, voc, t, annotation, u)[len(t[0]) + 2:-1] for t, u in terminals)
+            yield '/~*\n%s\n(%s)\n*~/\n\n%s\n\n' % (readable, id, tree)
+        else:
+            yield tree + '\n\n'
+
+# lines of a MED lemma list in HTML, as read by penntools.py --clean_lemmas
+def makeMEDList(corpus='me', size=2000, seed=1):
+    rnd = random.Random(seed)
+    lemmas = sorted(set(l for f, l in vocab[corpus]['verbs'] + vocab[corpus]['modals']))
+    letters = 'abcdefghiklmnoprstuwy'
+    while len(lemmas) < size:   # filler lemmas for realistic lookup costs
+        lemmas.append(''.join(rnd.choice(letters) for i in range(rnd.randint(3, 8))) + 'en')
+    return ["<a href='MED_%d.html'>[%s, v.]</a>\n" % (i + 1, l) for i, l in enumerate(lemmas)]
+
+def writeCorpus(fileName, records):
+    with open(fileName, 'w') as out:
+        for r in records:
+            out.write(r)
+
+#----------------------------------------------------------------------
+# benchmarks
+#----------------------------------------------------------------------
+
+# import the scripts as modules (penn-coding.py has a hyphen in its name)
+def loadScript(name, fileName):
+    if scriptDir not in sys.path:
+        sys.path.insert(0, scriptDir)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(scriptDir, fileName))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# time fn(), return the fastest of repeat runs in seconds; setup() is not timed
+def timeIt(fn, repeat, setup=None):
+    best = None
+    for i in range(repeat):
+        if setup:
+            setup()
+        t = time.perf_counter()
+        with open(os.devnull, 'w') as null, redirect_stdout(null), redirect_stderr(null):
+            try:
+                fn()
+            except SystemExit:   # the penntools functions call sys.exit()/quit()
+                pass
+        t = time.perf_counter() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+# benchmarks for one corpus size, returns dict name:seconds
+def runBenchmarks(args, size, selected):
+    results = {}
+    pt = loadScript('penntools', 'penntools.py')
+    pc = loadScript('penncoding', 'penn-coding.py')
+    pc.args = argparse.Namespace(debug=False)   # debug() reads the global args
+    kw = {'corpus': args.corpus, 'depth': args.depth, 'words': args.words, 'seed': args.seed}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='penn-bench-') as tmp:
+        os.chdir(tmp)   # penntools.py writes its tmp-penntools-* files here
+        try:
+            psd = 'bench.psd'
+            writeCorpus(psd, makeCorpus(size, annotation='none', **kw))
+            codText = ''.join(makeCorpus(size, annotation=args.annotation, form='cod', **kw))
+            sentences = [s for s in codText.split('/~*') if '(ID ' in s]
+            parsed = [re.sub(r'\t', '        ', s.split('*~/')[1]) for s in sentences]
+
+            def extract():
+                sys.argv = ['penntools.py', '-c', '1', psd]
+                pt.main()
+            if 'extract' in selected:
+                results['extract'] = timeIt(extract, args.repeat)
+
+            def prepareMerge():   # node index and fake tagger output, as in penntools.sh
+                if not os.path.isfile('bench.merge'):
+                    timeIt(extract, 1)
+                    voc = vocab[args.corpus]   # columns: node number, word, tag, lemma
+                    with open('tmp-penntools-nodes') as nodes, open('bench.merge', 'w') as out:
+                        for line in nodes:
+                            if '\t' in line:
+                                nr, word = line.rstrip('\n').split('\t')
+                                out.write('%s\t%s\t%s\t%s\n' % (nr, word, voc['tags'].get('N', 'N'), word))
+            def merge():
+                sys.argv = ['penntools.py', '-m', 'bench.merge', psd]
+                pt.mergeAnnotation()
+            if 'merge' in selected:
+                results['merge'] = timeIt(merge, args.repeat, prepareMerge)
+
+            med = 'bench-med.html'
+            with open(med, 'w') as out:
+                out.writelines(makeMEDList(args.corpus))
+            rnn = 'bench-rnn.psd'
+            writeCorpus(rnn, makeCorpus(size, annotation='rnn', unknown=0.3, **kw))
+            def clean():
+                sys.argv = ['penntools.py', '--clean_lemmas', med, rnn]
+                pt.cleanLemmas()
+            if 'clean_lemmas' in selected:
+                results['clean_lemmas'] = timeIt(clean, args.repeat)
+
+            if 'best_lemma' in selected:
+                medLemmas = {re.sub(r'.*\[(.*?),.*', r'\1', l).strip(): '' for l in makeMEDList(args.corpus)}
+                rnd = random.Random(args.seed)
+                forms = [rnd.choice(vocab[args.corpus]['verbs'])[0] for i in range(size)]
+                results['best_lemma'] = timeIt(lambda: [pt.bestLemma(f, medLemmas) for f in forms], args.repeat)
+            if 'best_lemma_rules' in selected:   # suffix rules learned from the vocabulary (--rules) before fuzzy matching
+                import pennrules
+                medLemmas = {re.sub(r'.*\[(.*?),.*', r'\1', l).strip(): '' for l in makeMEDList(args.corpus)}
+                rnd = random.Random(args.seed)
+                forms = [rnd.choice(vocab[args.corpus]['verbs'])[0] for i in range(size)]
+                pairs = [(pt.meSimplify(f), pt.meSimplify(l)) for f, l in vocab[args.corpus]['verbs'] + vocab[args.corpus]['modals']]
+                pt.lemmaRules = pennrules.makeTrie(pennrules.learnRules(pairs))
+                results['best_lemma_rules'] = timeIt(lambda: [pt.bestLemma(f, medLemmas) for f in forms], args.repeat)
+                pt.lemmaRules = None
+
+            both = 'bench-both.psd'
+            writeCorpus(both, makeCorpus(size, annotation='both', **kw))
+            def repair():
+                sys.argv = ['penntools.py', '-r', both]
+                pt.repair()
+            if 'repair' in selected:
+                results['repair'] = timeIt(repair, args.repeat)
+
+            if 'get_codings' in selected:
+                results['get_codings'] = timeIt(lambda: [pc.getCodings(p) for p in parsed], args.repeat)
+            if 'remove_nested_verbs' in selected:
+                ips = [(re.findall(r'\(([A-Z][^ \)]*? [^ \)]+?)\)', p), p) for p in parsed]
+                results['remove_nested_verbs'] = timeIt(lambda: [pc.removeNestedVerbs(list(n), p) for n, p in ips], args.repeat)
+            if 'penn2html' in selected:
+                results['penn2html'] = timeIt(lambda: [pc.penn2html(p) for p in parsed], args.repeat)
+            if 'startup' in selected:   # one process per file, as in penntools.sh: imports and option parsing
+                writeCorpus('bench-one.psd', makeCorpus(1, annotation='none', **kw))
+                cmd = [sys.executable, os.path.join(scriptDir, 'penntools.py'), 'extract', '-c', '1', '-o', 'bench-one.xml', 'bench-one.psd']
+                results['startup'] = timeIt(lambda: subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), args.repeat)
+            if 'code' in selected:   # native coding of the psd trees (penn-coding.py --psd)
+                import penncode, penncorpora
+                profile = penncorpora.getProfile(args.corpus)
+                with open(psd) as f:
+                    records = f.read().split('\n\n')
+                results['code'] = timeIt(lambda: [penncode.codeRecord(r, profile) for r in records], args.repeat)
+        finally:
+            os.chdir(cwd)
+    return results
+
+#----------------------------------------------------------------------
+# regression checks
+#----------------------------------------------------------------------
+
+# native coding (penn-coding.py --psd): every IP gets a CODING node found by getCodings,
+# whatever whitespace follows the IP label (newline, tab, several spaces)
+def checkCoding(args):
+    import penncode, penncorpora
+    pc = loadScript('penncoding', 'penn-coding.py')
+    pc.args = argparse.Namespace(debug=False)
+    profile = penncorpora.getProfile(args.corpus)
+    records = list(makeCorpus(100, args.corpus, args.depth, args.words, 'none', seed=args.seed))
+    failed = 0
+    for name, ws in (('space', ' '), ('newline', '\n    '), ('tab', '\t'), ('spaces', '   ')):
+        for r in records:
+            variant = re.sub(r'(\(IP\S*) ', lambda m: m.group(1) + ws, r)
+            ips = len(re.findall(r'\(IP', variant))
+            coded = penncode.codeRecord(variant, profile)
+            sparsed = re.sub(r'\t', '        ', coded.split('*~/')[1])   # as splitRecord
+            found = len(pc.getCodings(sparsed))
+            if found != ips:
+                failed += 1
+                sys.stderr.write('--- coding, %s after the IP label: %d of %d IPs coded in %s\n'
+                                 % (name, found, ips, re.search(r'\(ID ([^)]+)\)', r).group(1)))
+    return failed
+
+checks = [checkCoding]
+
+benchmarks = ['extract', 'merge', 'clean_lemmas', 'best_lemma', 'best_lemma_rules', 'repair', 'get_codings', 'remove_nested_verbs', 'penn2html', 'code', 'startup']
+
+# print a table: benchmark, size, seconds, (old seconds, ratio)
+def report(results, old):
+    for name in benchmarks:
+        for size, seconds in results['results'].get(name, {}).items():
+            line = '%-20s %8s %10.4fs' % (name, size, seconds)
+            before = old.get('results', {}).get(name, {}).get(size) if old else None
+            if before:
+                line += '   before: %10.4fs  ratio: %5.2f' % (before, seconds / before)
+            sys.stderr.write(line + '\n')
+
+def main():
+    args = get_arguments()
+    if args.list:
+        print('\n'.join(benchmarks))
+        return
+    sizes = [int(s) for s in args.sizes.split(',')]
+    if args.generate:
+        if args.generate.endswith('.html'):
+            with open(args.generate, 'w') as out:
+                out.writelines(makeMEDList(args.corpus, sizes[0]))
+        else:
+            form = 'cod' if args.generate.endswith('.cod') else 'psd'
+            writeCorpus(args.generate, makeCorpus(sizes[0], args.corpus, args.depth, args.words, args.annotation, form, seed=args.seed))
+        sys.stderr.write('Synthetic corpus written to %s\n' % args.generate)
+        return
+    if args.check:
+        failed = sum(check(args) for check in checks)
+        sys.stderr.write('--- regression checks: %d failures\n' % failed)
+        sys.exit(1 if failed else 0)
+    selected = args.bench.split(',') if args.bench else benchmarks
+    results = {
+        'date': str(datetime.datetime.now()),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'generate', 'list')},
+        'results': {},
+    }
+    for size in sizes:
+        sys.stderr.write('--- corpus size: %d sentences\n' % size)
+        for name, seconds in runBenchmarks(args, size, selected).items():
+            results['results'].setdefault(name, {})[str(size)] = seconds
+    old = None
+    if args.compare:
+        with open(args.compare) as inp:
+            old = json.load(inp)
+    report(results, old)
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+        sys.stderr.write('Results written to %s\n' % args.output)
+
+# -------------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,17 @@ from xmlrpc.client import boolean
 import subprocess   # for system commands, here: tree-tagger
 from collections import defaultdict   #  make dictionaries with initialised keys (avoids KeyError)
 from itertools import count
+import functools   # lru_cache for pages rendered by --serve
+from urllib.parse import quote, unquote, urlparse, parse_qs
 #import csv
+from pennio import readRecords, readRecordsAt, redirectOutput, compressed   # compressed files, streaming records
+from pennprofile import startProfile, stage, timedIter, countUp   # option --profile
+from penncorpora import getProfile, VERB, COORD, CODING   # corpus profiles, tag classification
+from penncode import codeRecord   # option --psd: native coding, without CorpusSearch
+from pennindex import queryRecords, openIndex   # option -Q: search index, --serve: offset table
+from penntable import SqliteRows, Aggregate   # options --sqlite, --aggregate
+from penncheckpoint import checkpointFile, checkOutput, saveCheckpoint, loadCheckpoint, removeCheckpoint   # --checkpoint, --resume
+from pennmeta import Metadata, textKey, columns as metaColumns   # option --meta: text metadata table
 
 # global variables
 htmlServer = "https://141.58.164.21/basics"  # julienas (IP to reduce file size). June24-: https
@@ -59,122 +69,89 @@ Coding and HTML conversion by A. Stein (University of Stuttgart)<br>
 ''' % (os.path.basename(__file__), __version__, str(datetime.date.today()))
 corpusName = 'MCVF-PPCHF'  # default
 htmlDir = "mcvf-ppchf"
+metadata = None   # option --meta: year, period, genre, corpus by text (pennmeta.Metadata)
+yearColumn = None   # with --meta: column of the CODING attribute year (replaced by the year of the table)
+reSent = re.compile(r'\*~/.*\(ID (.*?)\)', re.DOTALL)      # DOTALL  . match also \n
 
 def main(args):
-  global htmlDir
+  global htmlDir, lastFile, htmlHead, metadata, yearColumn
+  if args.serve:   # --serve: no table, render sentences on request
+    serve(args)
   errorNr = 0   # for log file
   sNr = 0  # counter for sentences
   cNr = 0  # counter for CODING
   rowNr = 0  # counter for output rows
   headerPrinted = None  # control printing of column header
-  featHeader = []  # column header
-  htmlFile = '' # html output file 
   suffix = dict()  # html file suffix
-  id = ''  # printable ID
-  pid = ''  # unique ID for match
-  sprint = ''  # printable example
-  sparsed = ''  # parsed example (bracket structure)
   lCode = args.lemma_code  # 'l'  # default lemma code  @l=
-  reVerbPOS = args.verb_pos  # extract info for these POS
-  with open(args.cod_file, 'r') as file:  # , newline=''
-    all = file.read() #file.split('\n\n')
-    sentences = all.split('/~*')
+  if args.profile or args.cprofile:
+    startProfile(args.cprofile)   # report stage times and counts on exit
+  # parametrize for different Penn corpora: -v and -c override the corpus profile
+  profile = getProfile(args.corpus, args.verb_pos, args.coord_pos)
+  sep = '\n\n' if args.psd else '/~*'
+  aggregate = Aggregate(args.aggregate) if args.aggregate else None   # -A: only pivot tables on stdout
+  if args.meta:   # --meta: columns of the metadata table joined to the rows
+    metadata = Metadata(args.meta)
+  position = (0, 0)   # --resume: number of the file and offset of the first record
+  if args.checkpoint or args.resume:
+    checkOutput(args.output)
+    if args.sqlite:
+      sys.exit('  error: --checkpoint and --resume do not work with --sqlite')
+    ckptFile = checkpointFile(args.output)
+  if args.jobs > 1 and (args.html or args.checkpoint or args.resume):
+    sys.exit('  error: --jobs does not work with -H, --checkpoint and --resume')
+  if args.resume:
+    position, state = loadCheckpoint(ckptFile)
+    sNr, cNr, rowNr, errorNr, headerPrinted, suffix, lastFile, htmlHead, aggregate, yearColumn = state
+  if args.jobs > 1:   # --jobs: files coded in parallel, rows written in the order of the files
+    sentences = []
+  else:
+    sentences = timedIter(inputRecords(args.files, sep, position, args))
+  if args.psd:   # code the psd trees here, records in cod format
+    sentences = timedIter(((fileNr, offset, codeRecord(r, profile)) for fileNr, offset, r in sentences), 'code')
+  if args.output:
+    redirectOutput(args.output, 'a' if args.resume else 'w')   # table to file, compressed by extension
   with open(logFile, 'w') as log:
     log.write('')  # init log file
-  if args.corpus:
-    corpusName = args.corpus  # parametrize for different Penn corpora
-    if re.search(r'(me|english|ppcme|pcmep|plaeme)', corpusName, re.IGNORECASE):
-      htmlDir = "penn-html"
-      reVerbPOS = '^(NEG\+)?(VA|VB|MD|DA|DO|HA|HV|BE).*'
-      reCoordPOS='V.*',   # TODO setting it here doesn't seem to work. Use -c
-    elif re.search(r'(pceec)', corpusName, re.IGNORECASE):
-      htmlDir = "pceec"
-#      reVerbPOS = '^(VB|MD|DA|DO|HA|HV).*'
-      reVerbPOS = '^(NEG\+)?(VA|VB|MD|DA|DO|HA|HV|BE).*'
-      reCoordPOS='V.*',
-    elif re.search(r'(mcvf)', corpusName, re.IGNORECASE):
-      htmlDir = "mcvf-ppchf"
-    else:
-      sys.exit('  error option --corpus: unknown corpus')
-  if args.coord_pos:
-    reCoordPOS = args.coord_pos  # count coordination for these POS
-  if args.html:
+  table = None   # --sqlite: rows go to the database instead of stdout
+  if args.sqlite:
+    table = SqliteRows(args.sqlite, {'source': ' '.join(args.files), 'corpus': profile['name'], 'lemma_code': lCode,
+                                     'script': '%s %s' % (os.path.basename(__file__), __version__)})
+  htmlDir = profile['htmlDir']
+  if args.html and not args.resume:
     os.makedirs(htmlDir, exist_ok=True)
-    debug("Directory '% s' created\n" % htmlDir)
+    debug("Directory '%s' created\n", htmlDir)
     with open(htmlDir+'/index.html', 'w') as file:
         file.write(htmlHead + '\n\n')
         file.write(htmlSource + '\n\n')
-  sys.stderr.write('Processing %s sentences.\n' % (str(len(sentences))))
-  sys.stderr.write('   Retrieving verb nodes matching "%s" \n' % (reVerbPOS))
-  sys.stderr.write('   Counting coordinated verbs matching "%s" \n' % (reCoordPOS))
-  for s in sentences:
+  sys.stderr.write('Processing sentences in %s\n' % (' '.join(args.files)))
+  sys.stderr.write('   Corpus profile %s\n' % (profile['name']))
+  sys.stderr.write('   Retrieving verb nodes matching "%s" \n' % (profile['verbPOS']))
+  sys.stderr.write('   Counting coordinated verbs matching "%s" \n' % (profile['coordPOS']))
+  recNr = 0
+  for fileNr, offset, s in sentences:   # readRecords displays progress
+    recNr += 1
+    if args.checkpoint and recNr % args.checkpoint == 0:   # state before this record
+      saveCheckpoint(ckptFile, (fileNr, offset), (sNr, cNr, rowNr, errorNr, headerPrinted, suffix, lastFile, htmlHead, aggregate, yearColumn),
+                     [sys.stdout, htmlDir+'/index.html', lastFile])
     sNr += 1
-    if sNr % 100 == 0:  # display progress
-        percent = int(sNr / len(sentences) * 100)
-        sys.stderr.write(" processed: " + str(percent) + '%' + '\r')
-    sprint = sparse = ''
-    # match print example and parsed structure
-    reSent = re.compile('\*~/.*\(ID (.*?)\)', re.DOTALL)      # DOTALL  . match also \n
-    if not re.search(reSent, s):   # . match also \n
-      continue  # skip records without ID code
-    else:
-      s = replaceAmalgamated(s)   #  MCVF: deal with '@' in amalgamations, e.g. el (< en+le) coded as e@ @l
-      id = re.search(reSent, s).group(1)
-      sp = s.split(r'*~/')
-      sprint = formatReadable(sp[0], lCode)
-      sparsed = sp[1]
-      sparsed = re.sub(r'\t', '        ', sparsed)
-      sparsed = re.sub(r'^\n', '', sparsed)  # strip blank lines
-      sparsed = re.sub(r'\n\n', '\n', sparsed)  # strip blank lines
-      codingNodes = getCodings(sparsed)
-      # for each coded IP (key = index) browse terminal nodes for CODING features and verbal nodes
-      reLem = re.compile(r'(.*?)@' + lCode + '=([^@]+)') # lemma in annotation
-      for key in sorted(codingNodes.keys()):   # for all coding node IPs
-        beginLine = len(re.findall(r'\n', sparsed[1:key], re.DOTALL)) + 1 # get line number for this CODING
-        # set column values for this coding IP
-        pid = id + '_' + str(beginLine)   # TODO: key char offset is not practical: get line number
-        htmlFile = openHTML(id, suffix, sprint, sparsed, 'urlFile')
-        url = '=HYPERLINK("%s/%s#%s"; "WWW")' % (htmlServer, htmlFile, id)
-        url2 = '=HYPERLINK("http://localhost/%s#%s"; "LOC")' % (htmlFile, id)
-        coord = 0
-        featRow = addFeatures = []   # empty feature list
-        nodes = codingNodes[key]   # list of terminal nodes under coding IP
-        # set coord to > 0 if more than one verbal (modal) node
-        coord = hitsInList(str(reCoordPOS), nodes) - 1   # histInList takes string (not re)
-        # for all terminal nodes
-        debug("======== NODES: "+ str(nodes))
-        for n in nodes:   
-          #debug("    ------ THIS NODE: "+ n)
-          pos, form = n.split(' ')    # original Penn pos and form
-          # process the CODING annotation
-          if re.search(r'CODING-(.*)', pos):   # get the features from the CODING node
-            ipType = re.search(r'CODING-(.*)', pos).group(1)
-            #debug(' >------- features: ' +str(key) + ': ' + form)
-            if not headerPrinted:      # define the column header, if not present
-              print(makeFeatureHeader(form))  # form are attribute:value pairs of CODING
-              headerPrinted = True
-            for f in form.split(':'):
-              val = re.sub(r'.*=', '', f)
-              addFeatures.append(val)
-            continue
-          # process verbs under this CODING IP
-          # - v1.6 stop after first lexical verb (pos = V.*) is found
-          if re.search(reVerbPOS, pos):   # get lexical info from these verbal nodes
-            vpos = re.sub(r'[-=]\d+', '', pos)   # strip indices
-            vlemma = 'NA'
-            vform = form  # default, if no annotation was added
-            if re.search(reLem, form):
-              vlemma = re.search(reLem, form).group(2)
-              vform = re.search(reLem, form).group(1)
-              vform = re.sub(r'@.*', '', form)
-            featRow = [pid, url, url2, ipType, vpos, vform, vlemma, str(coord)] + addFeatures
-            rowNr+=1
-            debug("Lemma: "+vlemma)
-            print('%s\t%s' % (str(rowNr), '\t'.join(featRow)))
-    # print sentence as HTML
-    if args.html:
-      openHTML(id, suffix, sprint, sparsed, 'nil')
+    header, rows = codeSentence(s, profile, lCode, not headerPrinted, args.html, suffix, lambda id: links(id, suffix))
+    if header:
+      writeHeader(header, table, aggregate)
+      headerPrinted = True
+    for featRow in rows:
+      rowNr+=1
+      countUp('rows')
+      with stage('write'):
+        writeRow([str(rowNr)] + featRow, table, aggregate)
+  if args.jobs > 1:
+    rowNr, headerPrinted = codeParallel(args, table, aggregate)
   # messages on exit
+  if table:
+    with stage('write'):
+      table.close()
+  if aggregate:
+    aggregate.write(sys.stdout)
   sys.stderr.write(str(rowNr) + ' lines written\n')
   if args.html:
     sys.stderr.write('HTML files written to folder %s \n' % htmlDir)
@@ -184,15 +161,299 @@ def main(args):
   if errorNr > 0:
     sys.stderr.write('  !!! %s error messages in %s\n' % (str(errorNr), logFile))
   log.close()
-  with open(htmlDir+'/index.html', 'a') as file:
-    file.write('\n</body>\n</html>\n')
-    file.close()
+  if args.html:   # index.html only exists with -H
+    with open(htmlDir+'/index.html', 'a') as file:
+      file.write('\n</body>\n</html>\n')
+      file.close()
+  if args.checkpoint or args.resume:
+    removeCheckpoint(ckptFile)   # complete
   sys.exit(0)
   
 #-------------------------------------------------------
 # functions
 #-------------------------------------------------------
 
+# input files in the order of the command line, files of a directory sorted by name
+def inputFiles(paths, psd):
+  extensions = tuple(('.psd' if psd else '.cod') + c for c in ('',) + compressed)
+  files = []
+  for path in paths:
+    if os.path.isdir(path):
+      files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(extensions)))
+    elif os.path.isfile(path):
+      files.append(path)
+    else:
+      sys.exit('  error: input file not found: %s' % path)
+  if not files:
+    sys.exit('  error: no %s files in %s' % ('psd' if psd else 'cod', ' '.join(paths)))
+  return(files)
+
+# generator: file number, offset and record of the records of all input files, from position (file number, offset)
+def inputRecords(files, sep, position, args, progress=True):
+  firstFile, start = position
+  for fileNr, fileName in enumerate(files):
+    if fileNr < firstFile:
+      continue
+    if fileNr > firstFile:
+      start = 0
+    if args.query or args.id:   # -Q, --id: only the matching records
+      records = ((offset, r) for offset, r in queryRecords(fileName, sep, args.query, args.query_index, args.id) if offset >= start)
+    else:
+      records = readRecords(fileName, sep, offsets=True, progress=progress, start=start)   # stream, also .gz .xz .zst
+    for offset, r in records:
+      yield (fileNr, offset, r)
+
+# returns the column header (if needHeader and the record has CODING nodes) and the rows (without number) of record s
+# - getLinks(id) returns the URL columns of a coded IP
+def codeSentence(s, profile, lCode, needHeader, html, suffix, getLinks):
+  header = None
+  rows = []
+  # match print example and parsed structure
+  mSent = reSent.search(s)
+  if not mSent:   # . match also \n
+    return(header, rows)  # skip records without ID code
+  tagClass = profile['classes']   # tag: categories (bit flags), one lookup per node
+  reLem = reLemma(lCode)
+  countUp('sentences')
+  with stage('parse'):
+    id, sprint, sparsed = splitRecord(s, lCode)
+    codingNodes = getCodings(sparsed)
+    countUp('coded IPs', len(codingNodes))
+  with stage('extract'):
+    # for each coded IP (key = index) browse terminal nodes for CODING features and verbal nodes
+    for key in sorted(codingNodes.keys()):   # for all coding node IPs
+      beginLine = len(re.findall(r'\n', sparsed[1:key], re.DOTALL)) + 1 # get line number for this CODING
+      # set column values for this coding IP
+      pid = id + '_' + str(beginLine)   # TODO: key char offset is not practical: get line number
+      url, url2 = getLinks(id)
+      coord = 0
+      featRow = addFeatures = []   # empty feature list
+      nodes = codingNodes[key]   # list of terminal nodes under coding IP
+      # set coord to > 0 if more than one verbal (modal) node
+      coord = hitsInList(tagClass, COORD, nodes) - 1
+      # for all terminal nodes
+      debug("======== NODES: %s", nodes)
+      for n in nodes:   
+        #debug("    ------ THIS NODE: "+ n)
+        pos, form = n.split(' ')    # original Penn pos and form
+        cls = tagClass[pos]
+        # process the CODING annotation
+        if cls & CODING:   # get the features from the CODING node
+          ipType = pos[len('CODING-'):]
+          #debug(' >------- features: ' +str(key) + ': ' + form)
+          if needHeader and not header:      # define the column header, if not present
+            header = makeFeatureHeader(form)   # form are attribute:value pairs of CODING
+          for f in form.split(':'):
+            val = re.sub(r'.*=', '', f)
+            addFeatures.append(val)
+          continue
+        # process verbs under this CODING IP
+        # - v1.6 stop after first lexical verb (pos = V.*) is found
+        if cls & VERB:   # get lexical info from these verbal nodes
+          vpos = re.sub(r'[-=]\d+', '', pos)   # strip indices
+          vlemma = 'NA'
+          vform = form  # default, if no annotation was added
+          mLem = reLem.search(form)
+          if mLem:
+            vlemma = mLem.group(2)
+            vform = re.sub(r'@.*', '', form)
+          featRow = [pid, url, url2, ipType, vpos, vform, vlemma, str(coord)] + addFeatures
+          debug("Lemma: %s", vlemma)
+          rows.append(featRow)
+  # print sentence as HTML
+  if html:
+    with stage('html'):
+      openHTML(id, suffix, sprint, sparsed, 'nil')
+  return(header, rows)
+
+# URL columns of a coded IP: links to the HTML file of the sentence (counted in suffix)
+def links(id, suffix):
+  htmlFile = openHTML(id, suffix, '', '', 'urlFile')
+  url = '=HYPERLINK("%s/%s#%s"; "WWW")' % (htmlServer, htmlFile, id)
+  url2 = '=HYPERLINK("http://localhost/%s#%s"; "LOC")' % (htmlFile, id)
+  if args.link_server:   # link to the sentence rendered by penn-coding.py --serve
+    url2 = '=HYPERLINK("%s/s/%s"; "LOC")' % (args.link_server.rstrip('/'), quote(id))
+  return(url, url2)
+
+@functools.lru_cache(maxsize=None)
+def reLemma(lCode):
+  return re.compile(r'(.*?)@' + lCode + '=([^@]+)') # lemma in annotation
+
+# column header to the table, the database or the aggregate
+def writeHeader(header, table, aggregate):
+  if metadata:
+    header = metaHeader(header)
+  if table:
+    table.header(header.split('\t'))
+  if aggregate:
+    aggregate.header(header.split('\t'))
+  if not (table or aggregate):
+    print(header)
+
+def writeRow(row, table, aggregate):
+  if metadata:
+    row = metaRow(row)
+  if table:
+    table.add(row)
+  if aggregate:
+    aggregate.add(row)
+  if not (table or aggregate):
+    print('\t'.join(row))
+
+# option --meta: header with the columns of the metadata table (year replaces the CODING attribute year)
+def metaHeader(header):
+  global yearColumn
+  cols = header.split('\t')
+  yearColumn = cols.index('year') if 'year' in cols else None
+  return '\t'.join(cols + [c for c in metaColumns if not (c == 'year' and yearColumn is not None)])
+
+# option --meta: row joined with the metadata of its text (dict lookup by the text of the ID in column nr)
+def metaRow(row):
+  values = metadata.lookup(row[1].rsplit('_', 1)[0])   # ID_line
+  if yearColumn is None:
+    return row + list(values)
+  if values[0] != 'NA':
+    row[yearColumn] = values[0]
+  return row + list(values[1:])
+
+# option --jobs: one worker per file, rows written to a temporary file; returns the file name and the header
+# - the URL columns depend on the sentences of the same text in earlier files: they are set when the rows are
+#   written, the worker writes a line '#  ID  number of coded IPs' before the rows of a record, and the number
+#   of the coded IP instead of the URL
+def codeFile(job):
+  global args
+  args, fileNr, tmpDir = job   # the globals of the worker (debug() reads args)
+  profile = getProfile(args.corpus, args.verb_pos, args.coord_pos)
+  sep = '\n\n' if args.psd else '/~*'
+  tmpFile = os.path.join(tmpDir, '%d.rows' % fileNr)
+  header = None
+  with open(tmpFile, 'w') as out:
+    for fileNr, offset, s in inputRecords(args.files[fileNr:fileNr+1], sep, (0, 0), args, False):
+      if args.psd:
+        s = codeRecord(s, profile)
+      ips = []
+      h, rows = codeSentence(s, profile, args.lemma_code, not header, False, None,
+                             lambda id: (ips.append(id) or str(len(ips) - 1), ''))
+      header = header or h
+      if ips:
+        out.write('#\t%s\t%d\n' % (ips[0], len(ips)))
+      for featRow in rows:
+        out.write('\t'.join(featRow) + '\n')
+  return(tmpFile, header)
+
+# option --jobs: code the files in parallel, number and write the rows in the order of the files
+def codeParallel(args, table, aggregate):
+  import tempfile
+  from multiprocessing import Pool
+  rowNr = 0
+  headerPrinted = None
+  suffix = dict()   # html file suffix
+  with tempfile.TemporaryDirectory(prefix='penn-coding-') as tmpDir, Pool(args.jobs) as pool:
+    for tmpFile, header in pool.imap(codeFile, [(args, fileNr, tmpDir) for fileNr in range(len(args.files))]):
+      if header and not headerPrinted:
+        writeHeader(header, table, aggregate)
+        headerPrinted = True
+      with open(tmpFile) as rows:
+        for line in rows:
+          row = line.rstrip('\n').split('\t')
+          if row[0] == '#':   # record: URLs of its coded IPs
+            urls = [links(row[1], suffix) for i in range(int(row[2]))]
+            continue
+          row[1:3] = urls[int(row[1])]
+          rowNr += 1
+          countUp('rows')
+          writeRow([str(rowNr)] + row, table, aggregate)
+      os.remove(tmpFile)
+  return(rowNr, headerPrinted)
+
+# returns ID, readable sentence (HTML) and parsed structure of a cod record
+def splitRecord(s, lCode):
+    s = replaceAmalgamated(s)   #  MCVF: deal with '@' in amalgamations, e.g. el (< en+le) coded as e@ @l
+    id = reSent.search(s).group(1)
+    sp = s.split(r'*~/')
+    sprint = formatReadable(sp[0], lCode)
+    sparsed = sp[1]
+    sparsed = re.sub(r'\t', '        ', sparsed)
+    sparsed = re.sub(r'^\n', '', sparsed)  # strip blank lines
+    sparsed = re.sub(r'\n\n', '\n', sparsed)  # strip blank lines
+    return(id, sprint, sparsed)
+
+# option --serve: local web server, renders sentences from the cod/psd file on request
+# - /s/ID      sentence with this ID (records are read via the offset table of the search index)
+# - /?id=ID    same, from the form on the start page
+# Rendered pages are kept in an LRU cache (--cache).
+def serve(args):
+  from http.server import HTTPServer, BaseHTTPRequestHandler
+  from html import escape
+  from pennindex import updateIndex
+  if len(args.files) > 1:
+    sys.exit('  error: --serve works with one input file')
+  codFile = args.files[0]
+  sep = '\n\n' if args.psd else '/~*'
+  db = openIndex(codFile, sep, args.query_index)
+  profile = getProfile(args.corpus, args.verb_pos, args.coord_pos)
+  lCode = args.lemma_code
+
+  def neighbour(offset, cmp, order):   # ID of the previous/next sentence
+    row = db.execute('SELECT id FROM records WHERE offset %s ? AND id IS NOT NULL ORDER BY offset %s LIMIT 1' % (cmp, order), (offset,)).fetchone()
+    return row[0] if row else None
+
+  # page of a sentence for a state (size, mtime) of the file; IDs not found raise KeyError and are not cached
+  @functools.lru_cache(maxsize=args.cache)
+  def page(id, stamp):
+    row = db.execute('SELECT offset FROM records WHERE id = ?', (id,)).fetchone()
+    record = next(readRecordsAt(codFile, sep, [row[0]]), None) if row else None
+    if not record or '(ID %s)' % id not in record[1]:
+      raise KeyError(id)
+    offset, s = record
+    if args.psd:
+      s = codeRecord(s, profile)
+    id, sprint, sparsed = splitRecord(s, lCode)
+    nav = ' '.join('<a href="/s/%s">%s</a>' % (quote(n), label) for n, label in
+                   ((neighbour(offset, '<', 'DESC'), '&lt;&lt;'), (neighbour(offset, '>', 'ASC'), '&gt;&gt;')) if n)
+    head = re.sub(r'<title>(.*?)</title>', lambda m: '<title>%s</title>' % escape(id), htmlHead)
+    return (head + nav + sentenceHTML(id, sprint, sparsed) + nav + htmlSource + htmlFoot).encode('utf8')
+
+  def render(id):
+    updateIndex(db, codFile, sep)   # the file may have been appended to or edited (nothing to do if not)
+    st = os.stat(codFile)
+    try:
+      return page(id, (st.st_size, st.st_mtime_ns))
+    except KeyError:
+      return None
+
+  class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+      url = urlparse(self.path)
+      id = parse_qs(url.query).get('id', [''])[0]
+      if url.path.startswith('/s/'):
+        id = unquote(url.path[len('/s/'):])
+      if id:
+        page = render(id)
+        status = 200
+        if page is None:
+          page = ('<html><body>ID not found: %s <a href="/">back</a></body></html>' % escape(id)).encode('utf8')
+          status = 404
+      else:
+        page = (htmlHead + '<h3>%s</h3>\n<form action="/">ID: <input name="id" size="40"> <input type="submit"></form>\n' % escape(codFile) + htmlFoot).encode('utf8')
+        status = 200
+      self.send_response(status)
+      self.send_header('Content-Type', 'text/html; charset=utf-8')
+      self.send_header('Content-Length', str(len(page)))
+      self.end_headers()
+      self.wfile.write(page)
+    def log_message(self, format, *values):
+      debug(format, *values)
+
+  server = HTTPServer(('localhost', args.port), Handler)
+  sys.stderr.write('Serving %s at http://localhost:%d/ (Ctrl-C to stop)\n' % (codFile, args.port))
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  server.server_close()
+  sys.exit(0)
+
 
 # for all IP with CODING, returns dict of indexes of enclosing ( )
 def getCodings(sparsed):
@@ -206,7 +467,7 @@ def getCodings(sparsed):
     for ip in re.finditer(reCode, sparsed):
         beg = ip.start()
         end = pairs[ip.start()]
-        debug(' index range of CODING IP: %s-%s %s ' % (beg, end, ip.group()))
+        debug(' index range of CODING IP: %s-%s %s ', beg, end, ip.group())
         codPairs[beg] = end    # pairs of matching ( ) of IPs with coding
     # loop through coded IPs, most embedded one first (i.e. with lower end index)
     while codPairs:
@@ -241,8 +502,8 @@ def removeNestedVerbs(nodes, s):
                 vNR += 1
                 vbegin = s.find(n)
                 thisNested = s[1:vbegin].count('(') - s[1:vbegin].count(')')
-                debug('   >> CHECK NODE: ' + n + '  begin=' + str(vbegin))
-                debug('      >> NESTED: ' + str(nested) + 'last='+lastNode + ' ---- thisNested=' + str(thisNested))
+                debug('   >> CHECK NODE: %s  begin=%s', n, vbegin)
+                debug('      >> NESTED: %s last=%s ---- thisNested=%s', nested, lastNode, thisNested)
                 if vNR == 1:
                     nested = thisNested
                     lastNode = n
@@ -250,13 +511,13 @@ def removeNestedVerbs(nodes, s):
                     if thisNested >= nested:
                         try:
                             nodes.remove(n)  #del nodes[n]
-                            debug('Removed ' + n)
+                            debug('Removed %s', n)
                         except ValueError:
                             pass
                     else:
                         try:
                             nodes.remove(lastNode)  #del nodes[n]
-                            debug('Removed ' + lastNode)
+                            debug('Removed %s', lastNode)
                         except ValueError:
                             pass
                         lastNode = n
@@ -278,21 +539,16 @@ def findParens(s):
         raise IndexError("No matching opening parens at: " + str(pstack.pop()))
     return pairs
 
-# returns number of occurrences of str in list elements
-def hitsInList(str, lst):
-  r = re.compile(str)   
-  l = [ s for s in lst if r.match(s) ]
+# returns number of nodes ('POS form') in list whose POS has category cls (see penncorpora.py)
+def hitsInList(tagClass, cls, lst):
+  l = [ s for s in lst if tagClass[s.split(' ', 1)[0]] & cls ]
   return(len(l))
 
 # file names for HTML output, with increments to avoid huge files
 def openHTML(id, suffix, sprint, sparsed, control):
   global lastFile   # use global var in this function
   id = re.sub(r'\?', '', id)  # delete question marks in PCEEC id
-  if re.search(r'period=.*,year=.*', id):  # if this is an ID of PCEEC
-    htmlFile = re.sub(r'.*year=', '', id)
-    htmlFile = re.sub(r'\..*', '', id)
-  else:
-    htmlFile = re.sub(r'[\.,].*', '', id)
+  htmlFile = textKey(id)   # text of the ID, also the key of the metadata table
   if htmlFile == '':
     sys.exit('no file (variable htmlFile cannot be empty)' + id)
   if htmlFile in suffix.keys():
@@ -338,11 +594,14 @@ def htmlFooter(htmlFile):
 
 def writeHTML(htmlFile, id, sprint, sparsed):
     with open(htmlFile, 'a') as file:
-        out = '\n<a name=\"%s\"></a><hr>\n<h3>%s</h3>\n%s<hr>\n\n<p><div class=\"parse\"><p>%s</em></p></div>\n' % (id, id, sprint, penn2html(sparsed))
+        out = sentenceHTML(id, sprint, sparsed)
 #        file.write(penn2html(sparsed) + '\n\n')
         file.write(out + '\n\n')
     return()
 
+def sentenceHTML(id, sprint, sparsed):
+    return('\n<a name=\"%s\"></a><hr>\n<h3>%s</h3>\n%s<hr>\n\n<p><div class=\"parse\"><p>%s</em></p></div>\n' % (id, id, sprint, penn2html(sparsed)))
+
 def makeFeatureHeader(features):
         featHeader = ["nr", "textid", "URLwww", "URLlok", "ipType", "pos", "form", "lemma", "coord"]
         for f in features.split(':'):
@@ -390,8 +649,11 @@ def indent(X, line):
     return(indent)
 
 # option -D print debug messages
-def debug(msg):
+# - message values are passed as arguments and only formatted with -D: debug('x=%s', x)
+def debug(msg, *values):
     if args.debug:
+        if values:
+            msg = msg % values
         sys.stderr.write('\n   DEBUG>>>'+msg+'<<<DEBUG\n')
     return()
 
@@ -413,24 +675,81 @@ Process output of CorpusSearch coding queries.
 Examples:
 - For MCVF corpus using lemma after '@rl=':
   penn-coding.py -H -l rl mcvf-ppchf-coding.cod > mcvf-ppchf-coding.csv
+- Compressed input and output:
+  penn-coding.py -l rl -o mcvf-ppchf-coding.csv.gz mcvf-ppchf-coding.cod.xz
+- Code the psd file directly (no CorpusSearch, no cod file):
+  penn-coding.py --psd -H -l rl all.psd > mcvf-ppchf-coding.csv
+- Several files or a folder (in this order, no concatenated copy), 4 files coded in parallel:
+  penn-coding.py --psd -l rl -j 4 -o mcvf-ppchf-coding.csv psd/
+- Only records with a coded infinitival IP and the lemma dire (search index mcvf-ppchf-coding.cod.qidx):
+  penn-coding.py -l rl -Q 'label:CODING-IP-INF*,lemma:dire' mcvf-ppchf-coding.cod
+- Table as sqlite database (typed columns, indexes on lemma, pos, ipType, textid; texts with year):
+  penn-coding.py -l rl --sqlite mcvf-ppchf-coding.db mcvf-ppchf-coding.cod
+- Long runs: checkpoint every 10000 records, continue after a crash with the same options plus --resume:
+  penn-coding.py -H -l rl --checkpoint 10000 -o mcvf-ppchf-coding.csv mcvf-ppchf-coding.cod
+  penn-coding.py -H -l rl --checkpoint 10000 --resume -o mcvf-ppchf-coding.csv mcvf-ppchf-coding.cod
+- Only frequency tables (pivot tables, no row table):
+  penn-coding.py -l rl -A lemma,dobj,year -A ipType,clit,neg mcvf-ppchf-coding.cod > counts.csv
+- Local web server instead of HTML files (-H), table links to it:
+  penn-coding.py --serve -l rl mcvf-ppchf-coding.cod
+  penn-coding.py -l rl --link_server http://localhost:8000 mcvf-ppchf-coding.cod > mcvf-ppchf-coding.csv
+- Year, period, genre and corpus of each text from a metadata table (written by penntools.py --meta_build):
+  penn-coding.py -l rl --meta texts.tsv mcvf-ppchf-coding.cod > mcvf-ppchf-coding.csv
+- One sentence (random access via the offset table in the search index):
+  penn-coding.py -D -l rl --id '1100-ROLAND-V,1.3' mcvf-ppchf-coding.cod
 ''', formatter_class = argparse.RawTextHelpFormatter   # allows triple quoting for multiple-line text
        )
 
-   parser.add_argument('cod_file', type=str,
-                       help='CorpusSearch cod file')
+   parser.add_argument('cod_file', type=str, nargs='+',
+                       help='CorpusSearch cod files, or psd files with --psd (may be compressed: .gz .xz .zst),\nor folders with these files (sorted by name); rows are numbered across the files')
    parser.add_argument('-C', '--corpus', type=str, default='MCVF',
-                       help='adapt to other Penn corpora: me=Middle English; pceec=PCEEC')
+                       help='adapt to other Penn corpora: mcvf, me=Middle English, plaeme, pceec=PCEEC (see penncorpora.py)')
    parser.add_argument('-D', '--debug', action='store_true',
                        help='print debugging messges (stderr)')
    parser.add_argument('-H', '--html', action='store_true',
                        help='create HTML output')
+   parser.add_argument('-o', '--output', type=str, default='',
+                       help='write table to this file instead of stdout (compressed if .gz .xz .zst)')
    parser.add_argument('-l', '--lemma_code', type=str, default='l',
                        help='define lemma code')
-   parser.add_argument('-c', '--coord_pos', type=str, default='(V.*|MD.*) ',
-                       help='count these POS under IP to determine coordination')
-   parser.add_argument('-v', '--verb_pos', type=str, default='^(V|MD|EJ|AJ).*',
-                       help='for these POS (regex) retrieve info from terminal nodes')
+   parser.add_argument('-c', '--coord_pos', type=str, default=None,
+                       help='count these POS under IP to determine coordination (default: corpus profile)')
+   parser.add_argument('--psd', action='store_true',
+                       help='input is a psd file: code the IPs natively (conditions of mcvf-ppchf-coding.q, see penncode.py)')
+   parser.add_argument('-Q', '--query', type=str, default='',
+                       help='process only records matching the query, e.g. label:CODING-IP-INF*,lemma:dire (see pennindex.py)')
+   parser.add_argument('--query_index', type=str, default='',
+                       help='with -Q, --id: search index (default: <input file>.qidx, built or updated on demand)')
+   parser.add_argument('--id', action='append', type=str, default=None,
+                       help='process only the sentence with this ID (repeatable, may contain * and ?)')
+   parser.add_argument('--sqlite', type=str, default='',
+                       help='write the table to this sqlite database instead of stdout (tables rows, texts, meta)')
+   parser.add_argument('-A', '--aggregate', action='append', default=None,
+                       help='instead of the rows, write counts for this combination of columns (comma-separated, repeatable),\nthe last column is spread over the columns of the pivot table, e.g. lemma,dobj,year')
+   parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='code several input files in parallel (rows are written in the order of the files)')
+   parser.add_argument('--checkpoint', type=int, default=0,
+                       help='with -o: save the state every N records to <output file>.ckpt, for --resume')
+   parser.add_argument('--resume', action='store_true',
+                       help='with -o: continue an interrupted run from its last checkpoint (same options)')
+   parser.add_argument('--serve', action='store_true',
+                       help='run a local web server rendering the sentences of the input file on request (instead of -H)')
+   parser.add_argument('--port', type=int, default=8000,
+                       help='with --serve: port (default 8000)')
+   parser.add_argument('--cache', type=int, default=1024,
+                       help='with --serve: number of rendered sentences kept in memory')
+   parser.add_argument('--link_server', type=str, default='',
+                       help='URLlok links to the sentences served by --serve at this URL, e.g. http://localhost:8000')
+   parser.add_argument('--meta', type=str, default='',
+                       help='join year, period, genre and corpus of the text (metadata table, see pennmeta.py) to each row')
+   parser.add_argument('--profile', action='store_true',
+                       help='report time per stage, counts per second and peak memory (stderr)')
+   parser.add_argument('--cprofile', type=str, default='',
+                       help='with --profile: write cProfile statistics to this file')
+   parser.add_argument('-v', '--verb_pos', type=str, default=None,
+                       help='for these POS (regex) retrieve info from terminal nodes (default: corpus profile)')
 
    args = parser.parse_args()
+   args.files = inputFiles(args.cod_file, args.psd)
 
    main(args)
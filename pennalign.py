@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# alignment of the tagger output to the numbered words of tmp-penntools-nodes (penntools.py merge TAGGED --align)
+# replaces paste tmp-penntools-nodes tmp-tagged, which shifts all later annotations if the tagger splits,
+# merges or drops a token
+# - both files are read as token streams, the empty lines after each sentence are tokens (anchors)
+# - tokens are paired while the words are equal; at a mismatch:
+#     split     the node word is the concatenation of 2-3 tagger tokens (tags and lemmas joined with +)
+#     merged    the tagger token is the concatenation of 2-3 node words (each node gets its annotation)
+#     changed   one node word and one tagger token differ, the next words agree (annotated)
+#     resync    the nearest pair of tokens within window tokens of both streams where two words
+#               (or a sentence boundary) agree again; the nodes skipped are not annotated
+#     sentence  no resync point: both streams continue after the next sentence boundary
+# - the nodes not annotated as the tagger output says are written to tmp-penntools-align (node, word, kind, tagger tokens)
+# Memory: the lookahead of the window. Time: linear, window^2 steps at a mismatch.
+
+from collections import deque
+
+window = 12   # tokens searched for a resync point
+maxParts = 3   # tokens of a split or merge
+alignFile = 'tmp-penntools-align'
+
+END = ('END',)   # end of a stream (boundaries are None)
+
+class Stream:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.buffer = deque()
+
+    def peek(self, i):
+        while len(self.buffer) <= i:
+            self.buffer.append(next(self.tokens, END))
+        return self.buffer[i]
+
+    def pop(self):
+        self.peek(0)
+        return self.buffer.popleft()
+
+# generator: (node number, word) and None for the empty line after a sentence
+def nodeTokens(fileName):
+    with open(fileName, 'r', encoding='utf8') as inp:
+        for line in inp:
+            line = line.rstrip('\n')
+            if line == '':
+                yield None
+            else:
+                nr, word = line.split('\t', 1)
+                yield (nr, word)
+
+# generator: (word, tag, lemma) of the tagger output (tag and lemma None if missing), None for empty lines
+def taggerTokens(fileName):
+    with open(fileName, 'r', encoding='utf8') as inp:
+        for line in inp:
+            row = line.rstrip('\n').split('\t')
+            if not any(row):
+                yield None
+            else:
+                yield (row[0], row[1] if len(row) > 1 else None, row[2] if len(row) > 2 else None)
+
+def word(t):
+    return t[-1] if len(t) == 2 else t[0]   # (nr, word) or (word, tag, lemma)
+
+def same(a, b):
+    if a is None or b is None:
+        return a is b
+    if a is END or b is END:
+        return False
+    return word(a) == word(b) or word(a).casefold() == word(b).casefold()
+
+def isWord(t):
+    return t is not None and t is not END
+
+# concatenation of the words of tokens i..i+k of a stream, None if they are not all words
+def joined(stream, k):
+    parts = [stream.peek(i) for i in range(k)]
+    if not all(isWord(t) for t in parts):
+        return None
+    return ''.join(word(t) for t in parts)
+
+# nearest (i, j) with tokens i of the nodes and j of the tagger agreeing, None if there is none within window
+def resyncPoint(nodes, tagged):
+    for d in range(1, 2 * window + 1):
+        for i in range(max(0, d - window), min(d, window) + 1):
+            j = d - i
+            a = nodes.peek(i)
+            b = tagged.peek(j)
+            if a is END or b is END:
+                continue
+            if a is None and b is None:
+                return (i, j)
+            if isWord(a) and same(a, b) and same(nodes.peek(i + 1), tagged.peek(j + 1)):
+                return (i, j)
+    return None
+
+def complete(t):
+    return t[1] is not None and t[2] is not None
+
+# (kind, k) if the node word is split into k tagger tokens or k node words are merged into one, else None
+def splitOrMerge(nodes, tagged):
+    for k in range(2, maxParts + 1):
+        if joined(tagged, k) == word(nodes.peek(0)):
+            return ('split', k)
+        if joined(nodes, k) == word(tagged.peek(0)):
+            return ('merged', k)
+    return None
+
+# generator: merge rows (node number, tagger word, tag, lemma) for the nodes of nodesFile
+# - report: open file for the nodes not aligned 1:1, counts: dict of counts by kind
+def alignTagged(nodesFile, taggedFile, report, counts):
+    nodes = Stream(nodeTokens(nodesFile))
+    tagged = Stream(taggerTokens(taggedFile))
+
+    def skipped(node, kind, tokens=()):
+        counts[kind] = counts.get(kind, 0) + 1
+        report.write('%s\t%s\t%s\t%s\n' % (node[0], node[1], kind, ' '.join(t[0] for t in tokens if isWord(t))))
+
+    while True:
+        a = nodes.peek(0)
+        b = tagged.peek(0)
+        if a is END:
+            break
+        if b is END:   # tagger output ends early
+            if isWord(a):
+                skipped(a, 'missing')
+            nodes.pop()
+            continue
+        if same(a, b):
+            nodes.pop()
+            tagged.pop()
+            if a is None:
+                continue
+            if complete(b):
+                counts['aligned'] = counts.get('aligned', 0) + 1
+                yield [a[0], b[0], b[1], b[2]]
+            else:
+                skipped(a, 'incomplete', [b])
+            continue
+        found = splitOrMerge(nodes, tagged) if isWord(a) and isWord(b) else None
+        if found and found[0] == 'split':
+            nodes.pop()
+            tokens = [tagged.pop() for i in range(found[1])]
+            skipped(a, 'split', tokens)
+            if all(complete(t) for t in tokens):
+                yield [a[0], a[1], '+'.join(t[1] for t in tokens), '+'.join(t[2] for t in tokens)]
+            continue
+        if found:   # merged
+            tagged.pop()
+            for i in range(found[1]):
+                node = nodes.pop()
+                skipped(node, 'merged', [b])
+                if complete(b):
+                    yield [node[0], node[1], b[1], b[2]]
+            continue
+        point = resyncPoint(nodes, tagged)
+        if point == (1, 1) and isWord(a) and isWord(b):   # one word changed by the tagger (e.g. normalised)
+            nodes.pop()
+            tagged.pop()
+            skipped(a, 'changed', [b])
+            if complete(b):
+                yield [a[0], b[0], b[1], b[2]]
+            continue
+        if point:
+            i, j = point
+            kind = 'resync'
+        else:   # continue after the next sentence boundary in both streams
+            i = 0
+            while isWord(nodes.peek(i)):
+                i += 1
+            j = 0
+            while isWord(tagged.peek(j)):
+                j += 1
+            kind = 'sentence'
+        tokens = [tagged.pop() for n in range(j)]
+        counts['dropped'] = counts.get('dropped', 0) + sum(1 for t in tokens if isWord(t))   # tagger tokens without node
+        for n in range(i):
+            node = nodes.pop()
+            if isWord(node):
+                skipped(node, kind, tokens)
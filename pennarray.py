@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# compact tree encoding of a psd corpus (penntools.py encode / --encode, read by triples --jobs)
+# - nodes in integer arrays, in the order of the psd file (depth first):
+#     parent (index, -1 for the top node of a sentence), depth, label, word, form, lemma (string ids, -1: none)
+#   word is the terminal as in the file (with annotation), form the part before the first @, lemma the @l= value
+# - sentences: index of the first node, byte offset of the record in the psd file, ID (string id, -1: none)
+# - string tables labels, words, forms, lemmas, ids: offsets and one UTF-8 block each
+# - FILE.ptree: magic, length of the JSON header, header (source file, sections), sections aligned to 8 bytes
+# Trees() maps the file (mmap) and the arrays are typed views of the mapped pages, without copies:
+# worker processes opening the same file share its pages, nothing is pickled (see mapSentences).
+
+import sys
+import json
+import mmap
+from array import array
+from penncode import parseTree
+from pennio import readRecords
+
+magic = b'PTREE1'
+nodeColumns = (('parent', 'i'), ('depth', 'B'), ('label', 'i'), ('word', 'i'), ('form', 'i'), ('lemma', 'i'))
+sentenceColumns = (('first', 'i'), ('offset', 'q'), ('id', 'i'))
+tableNames = ('labels', 'words', 'forms', 'lemmas', 'ids')
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id(self, s):
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    # offsets (n+1) and UTF-8 block
+    def arrays(self):
+        offsets = array('q', [0])
+        blocks = []
+        for s in self.strings:
+            b = s.encode('utf8')
+            blocks.append(b)
+            offsets.append(offsets[-1] + len(b))
+        return offsets, b''.join(blocks)
+
+# encode the records of a psd file, returns the number of sentences and nodes
+def encodeCorpus(psdFile, outFile, lemmaCode='l'):
+    cols = {name: array(code) for name, code in nodeColumns + sentenceColumns}
+    tables = {name: StringTable() for name in tableNames}
+    lemmaMark = '@' + lemmaCode + '='
+    errors = 0
+    for offset, s in readRecords(psdFile, '\n\n', offsets=True, progress=True):
+        try:
+            root = parseTree(s)
+        except ValueError:
+            errors += 1
+            sys.stderr.write('--- not encoded (unbalanced brackets): record at offset %d\n' % offset)
+            continue
+        if not root.kids:
+            continue
+        cols['first'].append(len(cols['parent']))
+        cols['offset'].append(offset)
+        id = -1
+        stack = [(k, -1, 0) for k in reversed(root.kids)]
+        while stack:
+            n, parent, depth = stack.pop()
+            i = len(cols['parent'])
+            cols['parent'].append(parent)
+            cols['depth'].append(min(depth, 255))
+            cols['label'].append(tables['labels'].id(n.label))
+            if n.word is None:
+                cols['word'].append(-1)
+                cols['form'].append(-1)
+                cols['lemma'].append(-1)
+                stack.extend((k, i, depth + 1) for k in reversed(n.kids))
+                continue
+            cols['word'].append(tables['words'].id(n.word))
+            cols['form'].append(tables['forms'].id(n.word.split('@', 1)[0]))
+            if lemmaMark in n.word:
+                cols['lemma'].append(tables['lemmas'].id(n.word.split(lemmaMark, 1)[1].split('@', 1)[0]))
+            else:
+                cols['lemma'].append(-1)
+            if n.label == 'ID' and id < 0:
+                id = tables['ids'].id(n.word)
+        cols['id'].append(id)
+    cols['first'].append(len(cols['parent']))   # end of the last sentence
+    sections = [(name, cols[name]) for name, code in nodeColumns + sentenceColumns]
+    for name in tableNames:
+        offsets, block = tables[name].arrays()
+        sections.append((name + '.offsets', offsets))
+        sections.append((name, block))
+    writeSections(outFile, sections, {'source': psdFile, 'lemmaCode': lemmaCode})
+    nSentences = len(cols['id'])
+    sys.stderr.write('--- %d sentences, %d nodes encoded in %s%s\n' % (nSentences, len(cols['parent']), outFile,
+                     ' (%d errors)' % errors if errors else ''))
+    return nSentences, len(cols['parent'])
+
+def align(n):
+    return (n + 7) // 8 * 8
+
+# sections: (name, array or bytes), meta: source file and lemma code
+def writeSections(outFile, sections, meta):
+    header = {'meta': meta, 'sections': {}}
+    pos = 0
+    for name, data in sections:
+        code = data.typecode if isinstance(data, array) else 'B'
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        header['sections'][name] = [pos, size, code]
+        pos = align(pos + size)
+    head = json.dumps(header).encode('utf8')
+    start = align(len(magic) + 8 + len(head))
+    with open(outFile, 'wb') as out:
+        out.write(magic + len(head).to_bytes(8, 'little') + head)
+        out.write(b'\0' * (start - out.tell()))
+        for name, data in sections:
+            out.write(data if isinstance(data, bytes) else data.tobytes())
+            out.write(b'\0' * (start + align(out.tell() - start) - out.tell()))
+
+class Trees:
+    def __init__(self, fileName):
+        self.fileName = fileName
+        with open(fileName, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(magic)] != magic:
+            sys.exit('  error: %s is not a tree encoding (penntools.py encode)' % fileName)
+        n = int.from_bytes(self.mm[len(magic):len(magic) + 8], 'little')
+        header = json.loads(self.mm[len(magic) + 8:len(magic) + 8 + n])
+        start = align(len(magic) + 8 + n)
+        self.source = header['meta']['source']   # psd file
+        self.view = memoryview(self.mm)
+        self.views = {}
+        for name, (pos, size, code) in header['sections'].items():
+            self.views[name] = self.view[start + pos:start + pos + size].cast(code)
+        for name, code in nodeColumns + sentenceColumns:
+            setattr(self, name, self.views[name])
+        self.nSentences = len(self.id)
+
+    def string(self, table, i):
+        if i < 0:
+            return None
+        offsets = self.views[table + '.offsets']
+        return bytes(self.views[table][offsets[i]:offsets[i + 1]]).decode('utf8')
+
+    def nodes(self, sentence):
+        return range(self.first[sentence], self.first[sentence + 1])
+
+    # (label, word) of the terminal nodes of a sentence
+    def terminals(self, sentence):
+        return [(self.string('labels', self.label[i]), self.string('words', self.word[i]))
+                for i in self.nodes(sentence) if self.word[i] >= 0]
+
+    def close(self):
+        for v in self.views.values():
+            v.release()
+        self.views = {}
+        self.view.release()
+        self.mm.close()
+
+opened = {}   # trees opened in this (worker) process
+
+def _work(job):
+    fileName, fn, start, end, context = job
+    if fileName not in opened:
+        opened[fileName] = Trees(fileName)
+    return fn(opened[fileName], start, end, context)
+
+# generator: results of fn(trees, start, end, context) for ranges of sentences, in the order of the sentences
+# - fn must be a module-level function; jobs processes map the same file
+def mapSentences(fileName, fn, jobs, context=None, chunk=2000):
+    trees = Trees(fileName)
+    n = trees.nSentences
+    trees.close()
+    ranges = [(fileName, fn, i, min(i + chunk, n), context) for i in range(0, n, chunk)]
+    if jobs <= 1:
+        for job in ranges:
+            yield _work(job)
+        return
+    from multiprocessing import Pool
+    with Pool(jobs) as pool:
+        yield from pool.imap(_work, ranges)
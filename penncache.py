@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# tagging cache for penntools.py (option --tag_cache, see penntools.sh)
+# - sqlite database: hash of the tagger name and the words of a sentence -> tags and lemmas of the words
+# - extraction: sentences found in the cache are not written to tmp-penntools-tagme, their annotation
+#   goes to tmp-penntools-cached (format of tmp-penntools-merge)
+# - merge (-m): reads tmp-penntools-cached with the tagger output and stores the newly tagged sentences
+#   (listed in tmp-penntools-sentences: hash and node numbers)
+
+import hashlib
+
+cachedFile = 'tmp-penntools-cached'
+sentencesFile = 'tmp-penntools-sentences'
+
+def sentenceKey(tagger, words):
+    return hashlib.sha1(('%s\0%s' % (tagger, '\n'.join(words))).encode('utf8')).hexdigest()
+
+def openCache(fileName):
+    import sqlite3   # not at start-up: penntools.py imports this module for every extraction
+    db = sqlite3.connect(fileName)
+    db.execute('CREATE TABLE IF NOT EXISTS tags (key TEXT PRIMARY KEY, annotation TEXT)')
+    return db
+
+# list of (tag, lemma) for the words of the sentence, or None
+def lookup(db, key):
+    row = db.execute('SELECT annotation FROM tags WHERE key = ?', (key,)).fetchone()
+    if not row:
+        return None
+    return [tuple(line.split('\t')) for line in row[0].split('\n')]
+
+# entries: (key, list of (tag, lemma))
+def store(db, entries):
+    db.executemany('INSERT OR REPLACE INTO tags VALUES (?, ?)',
+                   ((key, '\n'.join('%s\t%s' % a for a in annot)) for key, annot in entries))
+    db.commit()
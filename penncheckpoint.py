@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# checkpoints at record boundaries for long runs (options --checkpoint N and --resume of
+# penntools.py and penn-coding.py)
+# - every N records, the position (byte offset) of the next input record, the state of the script (counters,
+#   HTML files, lexicon ...) and the size of each output file are pickled to <output file>.ckpt
+# - --resume truncates the output files to these sizes, restores the state and continues reading
+#   at the offset, so that the output is the same as without interruption
+# - the checkpoint is removed when the run is complete
+# Output files must not be compressed (compressed streams cannot be truncated and appended to).
+
+import sys
+import os
+import pickle
+from pennio import compressed
+
+def checkpointFile(outputFile):
+    return outputFile + '.ckpt'
+
+def checkOutput(outputFile):
+    if not outputFile or outputFile.endswith(compressed):
+        sys.exit('  error: --checkpoint and --resume need an uncompressed output file (-o)')
+
+# files: open files (flushed) or names of files that are appended to
+def saveCheckpoint(fileName, offset, state, files):
+    sizes = {}
+    for f in files:
+        if isinstance(f, str):
+            if os.path.isfile(f):
+                sizes[f] = os.path.getsize(f)
+        else:
+            f.flush()
+            sizes[f.name] = os.fstat(f.fileno()).st_size
+    with open(fileName + '.tmp', 'wb') as out:
+        pickle.dump({'offset': offset, 'state': state, 'sizes': sizes}, out)
+    os.replace(fileName + '.tmp', fileName)   # the old checkpoint stays valid until the new one is complete
+
+# returns offset and state of the last checkpoint, after truncating the output files
+def loadCheckpoint(fileName):
+    if not os.path.isfile(fileName):
+        sys.exit('  error option --resume: no checkpoint %s' % fileName)
+    with open(fileName, 'rb') as inp:
+        ckpt = pickle.load(inp)
+    for name, size in ckpt['sizes'].items():
+        if os.path.isfile(name):
+            os.truncate(name, size)
+    sys.stderr.write('--- resuming at %s (%s)\n' % (ckpt['offset'], fileName))
+    return ckpt['offset'], ckpt['state']
+
+def removeCheckpoint(fileName):
+    if os.path.isfile(fileName):
+        os.remove(fileName)
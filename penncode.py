@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# native coding of psd files for penn-coding.py --psd (replaces the CorpusSearch coding query)
+# - each psd record is parsed once into a tree
+# - every IP* node gets a CODING node with the attributes of mcvf-ppchf-coding.q (see README.md)
+# - the coded record is returned in the format of the CorpusSearch cod output:
+#     readable sentence, (ID), *~/, tree with (CODING-IP-MAT ipHead=verb:clit=0:...)
+# Conditions are evaluated on the immediate constituents of the IP (embedded IP/CP not searched).
+
+import re
+from penncorpora import VERB, MODAL, IGNORE, MARKUP, BE, HAVE, INF, PART, CLIT, NEG
+
+codingAttributes = ['ipHead', 'clit', 'subj', 'dobj', 'iobj', 'pobj', 'ipobj', 'cpobj', 'spc', 'aux', 'reflself', 'reflclit', 'neg', 'year']
+ipTypes = {'SUB': 'sub', 'INF': 'inf', 'IMP': 'imp', 'SMC': 'smc', 'PPL': 'ppl', 'ABS': 'abs'}
+cpTypes = {'ADV': 'adv', 'CLF': 'clf', 'REL': 'rel', 'THT': 'tht', 'CMP': 'cmp', 'DEG': 'deg', 'FRL': 'frl', 'CAR': 'car'}
+argFunctions = {'SBJ': 'NPsbj', 'ACC': 'NPacc', 'DTV': 'NPdtv', 'PRN': 'NPprn'}
+
+reToken = re.compile(r'\(|\)|[^\s()]+')
+reIndex = re.compile(r'[-=]\d+$')
+reNoun = re.compile(r'^(N|NS|NPR|NPRS)$')
+reYear = re.compile(r'^(\d{3,4})\D')
+reSpace = re.compile(r'\s*')
+
+class Node:
+    __slots__ = ('label', 'kids', 'word', 'labelEnd')
+    def __init__(self):
+        self.label = ''
+        self.kids = []
+        self.word = None   # terminal nodes only
+        self.labelEnd = 0  # offset after the label in the record
+
+# returns the root of the (list of) trees in record s
+def parseTree(s):
+    stack = [Node()]
+    expectLabel = False
+    for m in reToken.finditer(s):
+        t = m.group()
+        if t == '(':
+            n = Node()
+            stack[-1].kids.append(n)
+            stack.append(n)
+            expectLabel = True
+        elif t == ')':
+            if len(stack) == 1:
+                raise ValueError('unbalanced ) at %d' % m.start())
+            stack.pop()
+            expectLabel = False
+        elif expectLabel:
+            stack[-1].label = t
+            stack[-1].labelEnd = m.end()
+            expectLabel = False
+        else:
+            n = stack[-1]
+            n.word = t if n.word is None else n.word + ' ' + t
+    if len(stack) > 1:
+        raise ValueError('unbalanced (')
+    return stack[0]
+
+def baseLabel(label):
+    return reIndex.sub('', label)
+
+def isClause(label):
+    return label.startswith(('IP', 'CP'))
+
+# generator: terminal nodes under node, optionally without embedded clauses
+def terminals(node, clause=False):
+    for k in node.kids:
+        if k.word is not None:
+            yield k
+        elif not (clause and isClause(k.label)):
+            yield from terminals(k, clause)
+
+def nodes(node):
+    for k in node.kids:
+        yield k
+        yield from nodes(k)
+
+def plainWord(w):
+    return w.split('@', 1)[0]
+
+def isEmpty(t):   # traces, empty subjects, 0 complementizers
+    return t.word.startswith('*') or t.word == '0'
+
+# realisation of an argument NP: lex pro quant clit null trace
+def argType(np, tagClass):
+    terms = [t for t in terminals(np) if not tagClass[t.label] & IGNORE]
+    if not terms:
+        return '0'
+    words = [t for t in terms if not isEmpty(t)]
+    if not words:
+        return 'trace' if terms[0].word.startswith(('*T*', '*ICH*')) else 'null'
+    tags = [baseLabel(t.label) for t in words]
+    if len(words) == 1 and tagClass[words[0].label] & CLIT:
+        return 'clit'
+    if any(reNoun.match(t) for t in tags):
+        return 'lex'
+    if any(t.startswith('PRO') for t in tags):
+        return 'pro'
+    if any(t.startswith('Q') for t in tags):
+        return 'quant'
+    return 'lex'
+
+def firstKid(kids, prefixes):
+    for k in kids:
+        if k.word is None and k.label.startswith(prefixes):
+            return k
+    return None
+
+def ipHead(ip, tagClass):
+    heads = [tagClass[k.label] for k in ip.kids if k.word is not None]
+    for c in heads:
+        if c & MODAL:
+            return 'MODINF' if c & INF else 'MOD'
+    for c in heads:
+        if c & BE:
+            return 'BE'
+        if c & HAVE:
+            return 'HAVE'
+    for c in heads:
+        if c & VERB:
+            return 'verb'
+    if firstKid(ip.kids, 'IP'):
+        return 'IP'
+    return '0'
+
+def aux(ip, tagClass):
+    heads = [tagClass[k.label] for k in ip.kids if k.word is not None]
+    auxiliary = [c for c in heads if c & (BE | HAVE) and not c & PART]
+    if not auxiliary:
+        return '0'
+    name = 'etre' if auxiliary[0] & BE else 'avoir'
+    if any(c & PART for c in heads):
+        return name
+    partp = firstKid(ip.kids, 'PARTP')
+    if partp and any(tagClass[t.label] & PART for t in terminals(partp, True)):
+        return name + 'prefinal'
+    return '0'
+
+# reflexive même/self in an NP with pronominal referent, coded as ADJP
+def reflSelf(ip, tagClass, reSelf):
+    for np in ip.kids:
+        if np.word is not None or not np.label.startswith('NP'):
+            continue
+        terms = list(terminals(np, True))
+        if not any(baseLabel(t.label).startswith('PRO') for t in terms):
+            continue
+        for n in nodes(np):
+            if n.label.startswith('ADJP') and any(reSelf.match(plainWord(t.word)) for t in terminals(n)):
+                function = baseLabel(np.label)[3:]
+                return argFunctions.get(function, 'NP')
+    return '0'
+
+# clitic se: function of the clitic (from its tag or the enclosing NP)
+def reflClit(ip, tagClass, reRefl):
+    for k in ip.kids:
+        if k.word is not None:
+            candidates = [(k, k.label)]
+        elif k.label.startswith('NP'):
+            candidates = [(t, k.label) for t in terminals(k, True)]
+        else:
+            continue
+        for t, label in candidates:
+            if tagClass[t.label] & CLIT and reRefl.match(plainWord(t.word)):
+                for f in ('ACC', 'DTV', 'RFL'):
+                    if f in t.label or f in label:
+                        return f.lower()
+                return 'null'
+    return '0'
+
+# returns the values of codingAttributes for an IP node
+def codeIP(ip, tagClass, regexes, year):
+    kids = ip.kids
+    clause = list(terminals(ip, True))
+    v = dict.fromkeys(codingAttributes, '0')
+    v['ipHead'] = ipHead(ip, tagClass)
+    v['clit'] = str(min(3, sum(1 for t in clause if tagClass[t.label] & CLIT)))
+    for att, prefixes in (('subj', 'NP-SBJ'), ('dobj', ('NP-ACC', 'NP-MSR')), ('iobj', 'NP-DTV')):
+        np = firstKid(kids, prefixes)
+        if np:
+            v[att] = argType(np, tagClass)
+    for k in kids:   # object clitics directly under IP, e.g. (CL-ACC le)
+        if k.word is not None and tagClass[k.label] & CLIT:
+            if 'ACC' in k.label and v['dobj'] == '0':
+                v['dobj'] = 'clit'
+            elif 'DTV' in k.label and v['iobj'] == '0':
+                v['iobj'] = 'clit'
+    pp = firstKid(kids, 'PP')
+    if pp:
+        np = firstKid(pp.kids, 'NP')
+        v['pobj'] = argType(np, tagClass) if np else 'lex'
+    ip2 = firstKid(kids, 'IP-')
+    if ip2:
+        v['ipobj'] = ipTypes.get(ip2.label.split('-')[1], 'other')
+    cp = firstKid(kids, 'CP')
+    if cp:
+        parts = cp.label.split('-')
+        v['cpobj'] = cpTypes.get(parts[1], 'cp') if len(parts) > 1 else 'cp'
+    v['aux'] = aux(ip, tagClass)
+    v['reflself'] = reflSelf(ip, tagClass, regexes['selfWord'])
+    v['reflclit'] = reflClit(ip, tagClass, regexes['reflWord'])
+    if any(tagClass[t.label] & NEG for t in clause):
+        v['neg'] = '1'
+    v['year'] = year
+    return ':'.join('%s=%s' % (a, v[a]) for a in codingAttributes)
+
+# returns psd record s in cod format, with a CODING node for each IP
+# - records without ID are returned unchanged (penn-coding.py skips them)
+def codeRecord(s, profile):
+    tagClass = profile['classes']
+    try:
+        root = parseTree(s)
+    except ValueError:
+        return s
+    ids = [n.word for n in nodes(root) if n.label == 'ID' and n.word]
+    if not ids:
+        return s
+    id = ids[0]
+    mYear = reYear.match(id)
+    year = mYear.group(1) if mYear else '0'
+    inserts = []
+    for n in nodes(root):
+        if n.word is None and n.label.startswith('IP') and n.kids:
+            pos = n.labelEnd   # the CODING node is the first daughter, one space after the label (see getCodings)
+            end = reSpace.match(s, pos).end()   # whitespace after the label (newline, tab, spaces) is replaced
+            lineStart = s.rfind('\n', 0, pos) + 1
+            indent = re.sub(r'[^\t]', ' ', s[lineStart:pos]) + ' '   # keep tabs of the original indentation
+            inserts.append((pos, end, ' (CODING-%s %s)\n%s' % (n.label, codeIP(n, tagClass, profile['re'], year), indent)))
+    words = [t.word for t in terminals(root) if not tagClass[t.label] & (IGNORE | MARKUP) and not isEmpty(t)]
+    parts = []
+    last = 0
+    for pos, end, text in sorted(inserts):
+        parts.append(s[last:pos])
+        parts.append(text)
+        last = end
+    parts.append(s[last:])
+    return '\n%s\n(%s)\n*~/\n\n%s\n' % (' '.join(words), id, ''.join(parts).strip('\n'))
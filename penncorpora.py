@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# corpus profiles for penntools.py and penn-coding.py
+# - all corpus-specific settings in one place (option -C/--corpus)
+# - regexes are compiled once per profile
+# - each tag is classified once, then looked up in profile['classes'], e.g.
+#     if profile['classes'][pos] & VERB: ...
+
+import re
+import sys
+
+# tag categories (bit flags)
+VERB = 1       # verbal nodes retrieved by penn-coding.py (reVerbPOS)
+MODAL = 2      # modal verbs
+COORD = 4      # counted for coordination under one IP (reCoordPOS)
+OPEN = 8       # open class tags (required for TreeTagger training)
+IGNORE = 16    # no word: ID, traces
+KEEPCASE = 32  # proper nouns and numerals keep upper case
+CODING = 64    # CODING nodes added by CorpusSearch
+MARKUP = 128   # meta-textual nodes (CODE, line breaks ...), not used for triples
+BE = 256       # forms of be/estre (native coding: ipHead, aux)
+HAVE = 512     # forms of have/avoir
+INF = 1024     # infinitives
+PART = 2048    # past participles
+CLIT = 4096    # clitics
+NEG = 8192     # negation
+
+defaults = {
+    'htmlDir': 'mcvf-ppchf',
+    'verbPOS': r'^(V|MD|EJ|AJ).*',
+    'coordPOS': r'(V.*|MD.*) ',     # matched against 'POS ', as the node strings 'POS form'
+    'modalPOS': r'^(NEG\+)?MD',
+    'openPOS': r'^(ADJ|ADV|V|N.*|NUM|VB|VB[A-Z])',
+    'ignorePOS': r'ID',
+    'keepCasePOS': r'(NPR|NUM)',
+    'codingPOS': r'CODING-',
+    'markupPOS': r'(ID|LB|CODE|LINEBREAK)',
+    # native coding (penncode.py)
+    'bePOS': r'^(NEG\+)?(E[JXG]|EPP)',
+    'havePOS': r'^(NEG\+)?(A[JXG]|APP)',
+    'infPOS': r'^(NEG\+)?(VX|EX|AX|MDX)',
+    'partPOS': r'^(NEG\+)?(VPP|EPP|APP|MDPP)',
+    'clitPOS': r'^CL',
+    'negPOS': r'^NEG',
+    'selfWord': r'(?i)^(m[eê]i?s?mes?|meesmes?)$',   # reflexive même (reflself)
+    'reflWord': r"(?i)^(se|s'?|soi)$",   # clitic se (reflclit)
+}
+
+# name matching: first profile whose pattern matches the --corpus value (case insensitive)
+corpusProfiles = {
+    'ME': {
+        'match': r'(me|english|ppcme|pcmep)',
+        'htmlDir': 'penn-html',
+        'verbPOS': r'^(NEG\+)?(VA|VB|MD|DA|DO|HA|HV|BE).*',
+        'coordPOS': r'V.*',
+        'bePOS': r'^(NEG\+)?BE',
+        'havePOS': r'^(NEG\+)?H[AV]',
+        'infPOS': r'^(NEG\+)?(VB|BE|HV|HA|DO|DA|MD0)([-=]|$)',
+        'partPOS': r'^(NEG\+)?(VAN|VBN|BEN|HVN|HAN|DAN|DON)',
+        'selfWord': r'(?i)^(self|selfe|selve|seolf|sylf|silf|seluen|selven|selfen)$',
+        'reflWord': r'(?!)',   # no clitics
+    },
+    'PLAEME': {
+        'match': r'(plaeme)',
+        'htmlDir': 'penn-html',
+        'verbPOS': r'^(NEG\+)?(VA|VB|MD|DA|DO|HA|HV|BE).*',
+        'coordPOS': r'V.*',
+        'bePOS': r'^(NEG\+)?BE',
+        'havePOS': r'^(NEG\+)?H[AV]',
+        'infPOS': r'^(NEG\+)?(VB|BE|HV|HA|DO|DA|MD0)([-=]|$)',
+        'partPOS': r'^(NEG\+)?(VAN|VBN|BEN|HVN|HAN|DAN|DON)',
+        'selfWord': r'(?i)^(self|selfe|selve|seolf|sylf|silf|seluen|selven|selfen)$',
+        'reflWord': r'(?!)',   # no clitics
+    },
+    'PCEEC': {
+        'match': r'(pceec)',
+        'htmlDir': 'pceec',
+        'verbPOS': r'^(NEG\+)?(VA|VB|MD|DA|DO|HA|HV|BE).*',
+        'coordPOS': r'V.*',
+        'bePOS': r'^(NEG\+)?BE',
+        'havePOS': r'^(NEG\+)?H[AV]',
+        'infPOS': r'^(NEG\+)?(VB|BE|HV|HA|DO|DA|MD0)([-=]|$)',
+        'partPOS': r'^(NEG\+)?(VAN|VBN|BEN|HVN|HAN|DAN|DON)',
+        'selfWord': r'(?i)^(self|selfe|selve|seolf|sylf|silf|seluen|selven|selfen)$',
+        'reflWord': r'(?!)',   # no clitics
+    },
+    'MCVF': {
+        'match': r'(mcvf)',
+        'htmlDir': 'mcvf-ppchf',
+    },
+}
+profileOrder = ['PLAEME', 'ME', 'PCEEC', 'MCVF']   # PLAEME before ME ('plaeme' contains 'me')
+
+loaded = {}   # (name, overrides): profile
+
+# returns the compiled profile for a corpus name; verbPOS/coordPOS override the profile (options -v -c)
+def getProfile(corpusName, verbPOS=None, coordPOS=None):
+    key = (corpusName.lower(), verbPOS, coordPOS)
+    if key in loaded:
+        return loaded[key]
+    name = None
+    for n in profileOrder:
+        if re.search(corpusProfiles[n]['match'], corpusName, re.IGNORECASE):
+            name = n
+            break
+    if name is None:
+        sys.exit('  error option --corpus: unknown corpus %s (known: %s)' % (corpusName, ', '.join(profileOrder)))
+    profile = dict(defaults)
+    profile.update(corpusProfiles[name])
+    profile['name'] = name
+    if verbPOS:
+        profile['verbPOS'] = verbPOS
+    if coordPOS:
+        profile['coordPOS'] = coordPOS
+    profile['re'] = {k: re.compile(v) for k, v in profile.items() if k.endswith(('POS', 'Word'))}
+    profile['classes'] = TagTable(profile['re'])
+    loaded[key] = profile
+    return profile
+
+# dictionary tag: categories, computed on first lookup of a tag
+class TagTable(dict):
+    def __init__(self, regexes):
+        super().__init__()
+        self.regexes = regexes
+    def __missing__(self, tag):
+        r = self.regexes
+        c = 0
+        if r['verbPOS'].search(tag):
+            c |= VERB
+        if r['modalPOS'].match(tag):
+            c |= MODAL
+        if r['coordPOS'].match(tag + ' '):
+            c |= COORD
+        if r['openPOS'].match(tag):
+            c |= OPEN
+        if r['ignorePOS'].match(tag):
+            c |= IGNORE
+        if r['keepCasePOS'].match(tag):
+            c |= KEEPCASE
+        if r['codingPOS'].match(tag):
+            c |= CODING
+        if r['markupPOS'].match(tag):
+            c |= MARKUP
+        if r['bePOS'].match(tag):
+            c |= BE
+        if r['havePOS'].match(tag):
+            c |= HAVE
+        if r['infPOS'].match(tag):
+            c |= INF
+        if r['partPOS'].match(tag):
+            c |= PART
+        if r['clitPOS'].match(tag):
+            c |= CLIT
+        if r['negPOS'].match(tag):
+            c |= NEG
+        self[tag] = c
+        return c
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# annotation diff of two versions of an annotated psd file (penntools.py diff OLD.psd NEW.psd, see README.md)
+# - both files are read in one pass, record by record (memory: the lookahead of the window)
+# - records are paired by ID in file order; if the IDs differ, the nearest pair of records with the same ID
+#   within window records of both files is searched, the records skipped are reported as removed (OLD)
+#   or added (NEW), key 'record'; without such a pair the records are compared by position
+# - terminals are paired by their position in the tree;
+#   if the terminals of a record differ (words inserted or removed), they are paired by word and tag
+# - output (tab-delimited): ID, position of the terminal in the sentence, byte offset in NEW, tag, word,
+#   annotation key, old value, new value ('-' if the key is missing)
+# - summary: changes by key, by tag and by lemma (stderr), all counts in tmp-penntools-diff-counts
+# Records compared by position with different IDs are reported as ID OLD/NEW.
+
+import sys
+import re
+from collections import defaultdict, deque
+from difflib import SequenceMatcher
+from pennio import readRecords, byteOffset
+
+diffKeys = ('rl', 'rt', 'l', 'm', 'e')   # default of --diff_keys
+countsFile = 'tmp-penntools-diff-counts'
+summaryLines = 20   # lines of each summary table on stderr
+window = 50   # records searched for the same ID when the IDs differ
+
+reTerminal = re.compile(r'\(([^\s()]+) ([^\s()]+)\)')
+reID = re.compile(r'\(ID ([^\)\(]+)\)')
+
+# form and annotation (key: value) of a terminal word, e.g. vint@rl=venir@rt=VER -> vint, {rl: venir, rt: VER}
+def splitAnnotation(word):
+    w = re.sub(r'@([@\)]|$)', '\x00\\1', word)   # amalgamated forms, e.g. e@ @l (see replaceAmalgamated)
+    w = re.sub(r'^@', '\x00', w)
+    parts = w.split('@')
+    annotation = {}
+    for a in parts[1:]:
+        key, sep, value = a.partition('=')
+        annotation[key] = value
+    return parts[0].replace('\x00', '@'), annotation
+
+# terminals of a record: list of (byte offset in the record, tag, form, annotation)
+def terminals(s):
+    result = []
+    for m in reTerminal.finditer(s):
+        tag = m.group(1)
+        if tag == 'ID' or tag.startswith('CODING'):
+            continue
+        form, annotation = splitAnnotation(m.group(2))
+        result.append((byteOffset(s, m.start(2)), tag, form, annotation))
+    return result
+
+# pairs (old index, new index) of the terminals, by position or, if the words differ, by word and tag
+def pairTerminals(old, new):
+    if len(old) == len(new) and all(o[2] == n[2] for o, n in zip(old, new)):
+        return [(i, i) for i in range(len(new))]
+    matcher = SequenceMatcher(None, [(t[1], t[2]) for t in old], [(t[1], t[2]) for t in new], autojunk=False)
+    return [(block.a + i, block.b + i) for block in matcher.get_matching_blocks() for i in range(block.size)]
+
+class Diff:
+    def __init__(self, keys, lemmaKeys=('l', 'rl')):
+        self.keys = keys
+        self.lemmaKeys = lemmaKeys
+        self.counts = {'key': defaultdict(int), 'tag': defaultdict(int), 'lemma': defaultdict(int)}
+        self.records = 0
+        self.terminals = 0
+        self.changed = 0
+        self.unpaired = 0   # terminals of NEW without a terminal in OLD
+        self.removed = 0   # records of OLD without a record in NEW
+        self.added = 0   # records of NEW without a record in OLD
+
+    def lemma(self, annotation):
+        for k in self.lemmaKeys:
+            if annotation.get(k):
+                return annotation[k]
+        return '-'
+
+    # writes the changes of a pair of records to out
+    def compare(self, oldRecord, newRecord, offset, out):
+        self.records += 1
+        mOld = reID.search(oldRecord)
+        mNew = reID.search(newRecord)
+        id = mNew.group(1) if mNew else '-'
+        if mOld and mNew and mOld.group(1) != id:
+            id = '%s/%s' % (mOld.group(1), id)
+        old = terminals(oldRecord)
+        new = terminals(newRecord)
+        self.terminals += len(new)
+        pairs = pairTerminals(old, new)
+        self.unpaired += len(new) - len(pairs)
+        for i, j in pairs:
+            pos, tag, form, annotation = new[j]
+            oldAnnotation = old[i][3]
+            for k in self.keys:
+                a = oldAnnotation.get(k, '-')
+                b = annotation.get(k, '-')
+                if a != b:
+                    self.changed += 1
+                    self.counts['key'][k] += 1
+                    self.counts['tag'][tag] += 1
+                    self.counts['lemma'][self.lemma(annotation)] += 1
+                    out.write('%s\t%d\t%d\t%s\t%s\t%s\t%s\t%s\n' % (id, j + 1, offset + pos, tag, form, k, a, b))
+
+    # writes a record of one file only: removed (in OLD, offset of the next record of NEW) or added (in NEW)
+    def skipped(self, id, offset, kind, out):
+        if kind == 'removed':
+            self.removed += 1
+            out.write('%s\t0\t%d\t-\t-\trecord\tpresent\t-\n' % (id or '-', offset))
+        else:
+            self.added += 1
+            out.write('%s\t0\t%d\t-\t-\trecord\t-\tpresent\n' % (id or '-', offset))
+
+    def summary(self):
+        sys.stderr.write('--- %d records, %d terminals: %d changed annotations, %d terminals not paired\n'
+                         % (self.records, self.terminals, self.changed, self.unpaired))
+        if self.removed or self.added:
+            sys.stderr.write('--- %d records removed, %d records added (key record)\n' % (self.removed, self.added))
+        with open(countsFile, 'w') as out:
+            for kind in ('key', 'tag', 'lemma'):
+                ranked = sorted(self.counts[kind].items(), key=lambda x: (-x[1], x[0]))
+                sys.stderr.write('--- changes by %s: %s\n' % (kind, ' '.join('%s=%d' % kv for kv in ranked[:summaryLines])))
+                for value, n in ranked:
+                    out.write('%s\t%s\t%d\n' % (kind, value, n))
+
+class Records:
+    def __init__(self, fileName, progress=False):
+        self.records = readRecords(fileName, '\n\n', offsets=True, progress=progress)
+        self.buffer = deque()
+
+    # (offset, record, ID) i records ahead, None at the end of the file
+    def peek(self, i):
+        while len(self.buffer) <= i:
+            item = next(self.records, None)
+            if item is None:
+                return None
+            m = reID.search(item[1])
+            self.buffer.append((item[0], item[1], m.group(1) if m else None))
+        return self.buffer[i]
+
+    def pop(self):
+        self.peek(0)
+        return self.buffer.popleft()
+
+# nearest (i, j) with records i of OLD and j of NEW having the same ID, None if there is none within window
+def resyncPoint(old, new):
+    for d in range(1, 2 * window + 1):
+        for i in range(max(0, d - window), min(d, window) + 1):
+            a = old.peek(i)
+            b = new.peek(d - i)
+            if a and b and a[2] is not None and a[2] == b[2]:
+                return (i, d - i)
+    return None
+
+# diff of oldFile and newFile (psd), changes written to out
+def diffFiles(oldFile, newFile, out, keys=diffKeys):
+    diff = Diff(keys)
+    old = Records(oldFile)
+    new = Records(newFile, progress=True)
+    end = 0   # offset after the last record of NEW read
+    while True:
+        a = old.peek(0)
+        b = new.peek(0)
+        if a is None or b is None:
+            break
+        if a[2] != b[2] and a[2] is not None and b[2] is not None:
+            point = resyncPoint(old, new)
+            if point:
+                for n in range(point[0]):
+                    diff.skipped(old.pop()[2], b[0], 'removed', out)
+                for n in range(point[1]):
+                    offset, record, id = new.pop()
+                    diff.skipped(id, offset, 'added', out)
+                continue
+        old.pop()
+        new.pop()
+        diff.compare(a[1], b[1], b[0], out)
+        end = b[0] + byteOffset(b[1], len(b[1]))
+    while old.peek(0):   # records at the end of OLD
+        diff.skipped(old.pop()[2], end, 'removed', out)
+    while new.peek(0):
+        offset, record, id = new.pop()
+        diff.skipped(id, offset, 'added', out)
+    diff.summary()
+    return diff.changed
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# search index for psd and cod files (option -Q/--query of penntools.py and penn-coding.py)
+# - sqlite database FILE.qidx mapping keys to the byte offsets of the records containing them
+#     label    node labels and POS tags, without indices (IP-INF, VAN, CODING-IP-MAT)
+#     lemma    lemmas annotated with @l= or @rl=
+#     form     word forms (without annotation)
+#     coding   attribute=value of CODING nodes (aux=etre)
+# - and the offset table of the file: start offset and ID of each record (random access with --id)
+# - built on the first query, updated incrementally if records were appended to the file
+# - query: comma-separated terms kind:value, all must match; values may contain * and ?
+#     penn-coding.py -Q 'label:CODING-IP-INF*,lemma:dire' corpus.cod
+# - IDs (option --id, repeatable, may contain * and ?):
+#     penntools.py --id '1100-ROLAND-V,1.3' corpus.psd
+
+import sys
+import os
+import re
+import hashlib
+import sqlite3
+from pennio import readRecords, readRecordsAt
+
+kinds = ('label', 'lemma', 'form', 'coding')
+batchSize = 100000   # postings per insert
+indexVersion = '2'   # rebuild indexes written by older versions
+
+reLabel = re.compile(r'\(([^\s()]+)')
+reTerminal = re.compile(r'\(([^\s()]+) ([^\s()]+)\)')
+reLemma = re.compile(r'@r?l=([^@]+)')
+reIndex = re.compile(r'([-=]\d+)+$')
+reID = re.compile(r'\(ID ([^\)\(]+)\)')
+
+def indexName(fileName, queryIndex=''):
+    return queryIndex or fileName + '.qidx'
+
+# set of (kind, key) in a psd or cod record
+def recordKeys(record):
+    if '*~/' in record:
+        record = record.split('*~/', 1)[1]   # cod: only the tree
+    keys = set()
+    for m in reLabel.finditer(record):
+        keys.add(('label', reIndex.sub('', m.group(1))))
+    for m in reTerminal.finditer(record):
+        tag, word = m.groups()
+        if tag.startswith('CODING'):
+            keys.update(('coding', f) for f in word.split(':'))
+        elif tag != 'ID' and not word.startswith('*'):
+            keys.update(('lemma', l) for l in reLemma.findall(word))
+            form = word.split('@', 1)[0]
+            if form:
+                keys.add(('form', form))
+    return keys
+
+# hash of the last 4 KB of the file before size (detects files that were changed, not appended to)
+def tailHash(fileName, size):
+    with open(fileName, 'rb') as f:
+        f.seek(max(0, size - 4096))
+        return hashlib.sha1(f.read(min(size, 4096))).hexdigest()
+
+# open the index of fileName, build or update it first
+def openIndex(fileName, sep, queryIndex=''):
+    db = sqlite3.connect(indexName(fileName, queryIndex))
+    db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+    db.execute('CREATE TABLE IF NOT EXISTS postings (kind TEXT, key TEXT, offset INTEGER, PRIMARY KEY (kind, key, offset)) WITHOUT ROWID')
+    db.execute('CREATE TABLE IF NOT EXISTS records (offset INTEGER PRIMARY KEY, id TEXT)')
+    db.execute('CREATE INDEX IF NOT EXISTS recordID ON records (id)')
+    updateIndex(db, fileName, sep)
+    return db
+
+def updateIndex(db, fileName, sep):
+    meta = dict(db.execute('SELECT key, value FROM meta'))
+    st = os.stat(fileName)
+    start = 0
+    if meta.get('sep') == sep and meta.get('version') == indexVersion:
+        oldSize = int(meta['size'])
+        if oldSize == st.st_size and meta['mtime'] == str(st.st_mtime_ns):
+            return   # up to date
+        if oldSize < st.st_size and meta['tail'] == tailHash(fileName, oldSize):
+            start = int(meta['resume'])   # appended: index from the last (possibly incomplete) record
+    sys.stderr.write('--- %s search index %s from offset %d\n' % ('updating' if start else 'building', indexName(fileName), start))
+    db.execute('DELETE FROM postings WHERE offset >= ?', (start,))
+    db.execute('DELETE FROM records WHERE offset >= ?', (start,))
+    last = start
+    batch = []
+    records = []   # offset, ID
+    for offset, record in readRecords(fileName, sep, offsets=True, progress=True, start=start):
+        last = offset
+        batch.extend((kind, key, offset) for kind, key in recordKeys(record))
+        mID = reID.search(record)
+        records.append((offset, mID.group(1) if mID else None))
+        if len(batch) >= batchSize:
+            db.executemany('INSERT OR IGNORE INTO postings VALUES (?, ?, ?)', batch)
+            db.executemany('INSERT OR REPLACE INTO records VALUES (?, ?)', records)
+            batch = []
+            records = []
+    db.executemany('INSERT OR IGNORE INTO postings VALUES (?, ?, ?)', batch)
+    db.executemany('INSERT OR REPLACE INTO records VALUES (?, ?)', records)
+    db.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+        ('version', indexVersion), ('sep', sep), ('size', str(st.st_size)), ('mtime', str(st.st_mtime_ns)),
+        ('resume', str(last)), ('tail', tailHash(fileName, st.st_size))])
+    db.commit()
+
+def globOp(value):
+    return 'GLOB' if re.search(r'[*?\[]', value) else '='
+
+# offsets of the records matching all terms of the query (None without terms)
+def query(db, terms):
+    result = None
+    for term in terms.split(',') if terms else []:
+        kind, sep, value = term.strip().partition(':')
+        if not sep or kind not in kinds:
+            sys.exit('  error option --query: use kind:value (kinds: %s), not %s' % (', '.join(kinds), term))
+        offsets = {r[0] for r in db.execute('SELECT offset FROM postings WHERE kind = ? AND key %s ?' % globOp(value), (kind, value))}
+        result = offsets if result is None else result & offsets
+    return result
+
+# offsets of the records with these IDs
+def idOffsets(db, ids):
+    offsets = set()
+    for id in ids:
+        found = [r[0] for r in db.execute('SELECT offset FROM records WHERE id %s ?' % globOp(id), (id,))]
+        if not found:
+            sys.stderr.write('--- ID not found: %s\n' % id)
+        offsets.update(found)
+    return offsets
+
+# generator: (offset, record) of the records matching the query and the IDs
+def queryRecords(fileName, sep, terms, queryIndex='', ids=None):
+    db = openIndex(fileName, sep, queryIndex)
+    offsets = query(db, terms)
+    if ids:
+        found = idOffsets(db, ids)
+        offsets = found if offsets is None else offsets & found
+    db.close()
+    offsets = sorted(offsets or [])
+    sys.stderr.write('--- query %s: %d records\n' % (' '.join([terms] + (ids or [])).strip(), len(offsets)))
+    return readRecordsAt(fileName, sep, offsets)
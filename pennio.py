@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# shared input/output functions for penntools.py and penn-coding.py
+# - compressed files (.gz .xz .zst) are read and written transparently, chosen by file extension
+# - records (psd sentences, cod sentences) are read as a stream, not with file.read()
+
+import sys
+import os
+import mmap
+import atexit
+
+chunkSize = 1 << 20   # bytes read per chunk when streaming records
+compressed = ('.gz', '.xz', '.zst')
+
+# open a plain or compressed file, mode as for open(): 'r', 'w', 'a', 'rb', 'wb', 'ab'
+# - fileobj: read the compressed data from this (already opened) binary file
+def openFile(fileName, mode='r', encoding='utf8', newline=None, fileobj=None):
+    binary = 'b' in mode
+    if fileName == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return stream.buffer if binary else stream
+    textArgs = {} if binary else {'encoding': encoding, 'newline': newline}
+    if not binary:
+        mode = mode.replace('t', '') + 't'
+    target = fileobj or fileName
+    if fileName.endswith('.gz'):
+        import gzip
+        return gzip.open(target, mode, **textArgs)
+    if fileName.endswith('.xz'):
+        import lzma
+        return lzma.open(target, mode, **textArgs)
+    if fileName.endswith('.zst'):
+        return zstdOpen(target, mode, **textArgs)
+    return open(fileName, mode.replace('t', ''), **textArgs)
+
+# zstd: stdlib from Python 3.14, else the optional package zstandard
+def zstdOpen(target, mode, **textArgs):
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            sys.exit('  error: .zst files require Python >= 3.14 or the package zstandard (pip install zstandard)')
+    return zstd.open(target, mode, **textArgs)
+
+# redirect standard output (print) to a file, compressed if the extension says so
+def redirectOutput(fileName, mode='w'):
+    out = openFile(fileName, mode)
+    sys.stdout = out
+    atexit.register(closeOutput, out)
+    return(out)
+
+def closeOutput(out):
+    if sys.stdout is out:
+        sys.stdout = sys.__stdout__
+    out.close()
+
+# generator: split a (compressed) file into records at separator sep, like file.read().split(sep)
+# - with offsets=True, yields (byte offset of record in the uncompressed file, record)
+# - with progress=True, writes the percentage of the (compressed) input file read to stderr
+# - start: byte offset of the first record (compressed files are decompressed up to start)
+def readRecords(fileName, sep, offsets=False, progress=False, start=0):
+    bSep = sep.encode('utf8')
+    raw = open(fileName, 'rb')
+    size = os.path.getsize(fileName) or 1
+    if fileName.endswith(compressed):
+        stream = openFile(fileName, 'rb', fileobj=raw)   # raw.tell() still gives the progress
+        skip = start
+        while skip > 0:
+            chunk = stream.read(min(chunkSize, skip))
+            if not chunk:
+                break
+            skip -= len(chunk)
+    else:
+        stream = raw
+        raw.seek(start)
+    buffer = b''
+    offset = start   # offset of buffer start in uncompressed data
+    rNr = 0
+    try:
+        while True:
+            chunk = stream.read(chunkSize)
+            if not chunk:
+                break
+            buffer += chunk
+            parts = buffer.split(bSep)
+            buffer = parts.pop()   # the last part may continue in the next chunk
+            for p in parts:
+                rNr += 1
+                if progress and rNr % 100 == 0:
+                    sys.stderr.write(" processed: " + str(int(raw.tell() / size * 100)) + '%' + '\r')
+                record = p.decode('utf8')
+                yield (offset, record) if offsets else record
+                offset += len(p) + len(bSep)
+        record = buffer.decode('utf8')
+        yield (offset, record) if offsets else record
+    finally:
+        if stream is not raw:
+            stream.close()
+        raw.close()
+
+# generator: (offset, record) for the records starting at the given byte offsets (sorted)
+# - plain files are memory-mapped, only the bytes of these records are read;
+#   compressed files: one pass, stopping after the last record
+def readRecordsAt(fileName, sep, offsets):
+    if not offsets:
+        return
+    if fileName.endswith(compressed):
+        wanted = set(offsets)
+        last = offsets[-1]
+        for offset, record in readRecords(fileName, sep, offsets=True):
+            if offset in wanted:
+                yield (offset, record)
+            if offset >= last:
+                break
+        return
+    bSep = sep.encode('utf8')
+    with open(fileName, 'rb') as inp, mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for offset in offsets:
+            end = mm.find(bSep, offset)
+            if end < 0:
+                end = len(mm)
+            yield (offset, mm[offset:end].decode('utf8'))
+
+# byte offset of character position pos in string s (utf8)
+def byteOffset(s, pos):
+    if s.isascii():
+        return pos
+    return len(s[:pos].encode('utf8'))
+
+# copy file fileName to binary stream out in one sequential pass, inserting strings at byte offsets
+# - inserts: iterable of (offset, string), sorted by offset (offsets in the uncompressed file)
+def spliceFile(fileName, out, inserts):
+    inp = openFile(fileName, 'rb')
+    pos = 0   # bytes of input copied so far
+    for offset, text in inserts:
+        while pos < offset:
+            chunk = inp.read(min(chunkSize, offset - pos))
+            if not chunk:
+                sys.exit('  error: offset %d beyond the end of %s (index does not match the file?)' % (offset, fileName))
+            out.write(chunk)
+            pos += len(chunk)
+        out.write(text.encode('utf8'))
+    while True:
+        chunk = inp.read(chunkSize)
+        if not chunk:
+            break
+        out.write(chunk)
+    inp.close()
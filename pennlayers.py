@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# standoff annotation layers for psd files (penntools.py --layer, --materialise)
+# Each annotation layer is kept separately in a layer store (folder <psd file>.layers):
+#   index.tsv     node number, byte offset of the terminal's ')' in the psd file, Penn tag, word
+#   <layer>.tsv   node number, annotation string inserted before ')', e.g. @rl=dire@rt=VERcjg
+# Layers: rnn (RNN tagger), lgerm (LGeRM), med (MED lemmas from --clean_lemmas), basics (@a=) ...
+# A layer can be re-run or replaced without touching the others; --materialise writes the
+# annotated psd file with the selected layers in one streaming pass.
+
+import sys
+import os
+import shutil
+from pennio import spliceFile
+
+# annotation inserted with --fill for nodes missing in a layer (as -r/--repair does)
+layerDefaults = {
+    'rnn': '@rl=NA@rt=NA',
+    'lgerm': '@l=NA@t=NA',
+}
+
+def storeDir(psdFile, layerStore=''):
+    return layerStore or psdFile + '.layers'
+
+# copy the node index of the extraction into the store
+def saveIndex(store, indexFile):
+    os.makedirs(store, exist_ok=True)
+    shutil.copyfile(indexFile, os.path.join(store, 'index.tsv'))
+
+# write a layer from (node number, annotation) pairs, sorted by node number
+def writeLayer(store, name, entries):
+    os.makedirs(store, exist_ok=True)
+    fileName = os.path.join(store, name + '.tsv')
+    n = 0
+    with open(fileName + '.tmp', 'w') as out:
+        for nr, annot in entries:
+            out.write('#%d\t%s\n' % (nodeNumber(nr), annot))
+            n += 1
+    os.replace(fileName + '.tmp', fileName)   # replace the old layer only when complete
+    sys.stderr.write('--- layer %s: %d nodes written to %s\n' % (name, n, fileName))
+    return(n)
+
+def layerNames(store):
+    return sorted(f[:-4] for f in os.listdir(store) if f.endswith('.tsv') and f != 'index.tsv')
+
+# generator: (node number as int, annotation) of a layer
+def readLayer(store, name):
+    fileName = os.path.join(store, name + '.tsv')
+    if not os.path.isfile(fileName):
+        sys.exit('  error: layer %s not found in %s (layers: %s)' % (name, store, ', '.join(layerNames(store))))
+    with open(fileName, 'r') as inp:
+        for line in inp:
+            nr, annot = line.rstrip('\n').split('\t', 1)
+            yield (nodeNumber(nr), annot)
+
+# generator: (node number as int, byte offset, tag, word) from index.tsv
+def readIndex(store):
+    fileName = os.path.join(store, 'index.tsv')
+    if not os.path.isfile(fileName):
+        sys.exit('  error: no node index in %s (run the extraction first)' % store)
+    with open(fileName, 'r') as inp:
+        for line in inp:
+            cols = line.rstrip('\n').split('\t')
+            yield (nodeNumber(cols[0]), int(cols[1]), cols[2] if len(cols) > 2 else '', cols[3] if len(cols) > 3 else '')
+
+def nodeNumber(nr):   # '#123' -> 123
+    if isinstance(nr, int):
+        return nr
+    return int(nr.lstrip('#'))
+
+# generator: join index and layers on node number (all sorted), yields (node, offset, tag, word, [annotation per layer])
+# - missing annotations are None
+def joinLayers(store, names):
+    layers = [readLayer(store, n) for n in names]
+    heads = [next(l, None) for l in layers]
+    for nr, offset, tag, word in readIndex(store):
+        annots = []
+        for i, l in enumerate(layers):
+            while heads[i] is not None and heads[i][0] < nr:   # annotation of a node not in the index
+                heads[i] = next(l, None)
+            if heads[i] is not None and heads[i][0] == nr:
+                annots.append(heads[i][1])
+                heads[i] = next(l, None)
+            else:
+                annots.append(None)
+        yield (nr, offset, tag, word, annots)
+
+# write psd file with the annotation of the layers (in this order) to binary stream out
+def materialise(psdFile, store, names, out, fill=False):
+    def inserts():
+        for nr, offset, tag, word, annots in joinLayers(store, names):
+            if fill:
+                annots = [layerDefaults.get(n, '') if a is None else a for n, a in zip(names, annots)]
+            text = ''.join(a for a in annots if a)
+            if text:
+                yield (offset, text)
+    spliceFile(psdFile, out, inserts())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# text metadata table (option --meta of penn-coding.py and penntools.py, --meta_build of penntools.py)
+# - table (tab-delimited, with header): text, year, period, genre, corpus
+#   text is the prefix of the sentence IDs, e.g. 1100-ROLAND-V for 1100-ROLAND-V,1.3 (see textKey)
+# - read once, keys and values interned; each row or triple looks up its text in a dict
+# - --meta_build writes the table from the IDs of a psd or cod file (year from the ID, period from the ID
+#   or the file name, corpus from -C or the file name), keeping the lines of an existing table:
+#   genre and corrected years are added by hand
+# Texts missing in the table get NA (reported once per text).
+
+import sys
+import os
+import re
+from pennio import readRecords
+
+columns = ('year', 'period', 'genre', 'corpus')
+missing = ('NA',) * len(columns)
+
+reTextKey = re.compile(r'[\.,]')
+rePCEEC = re.compile(r'period=.*,year=.*')
+reID = re.compile(r'\(ID ([^\)\(]+)\)')
+reYear = re.compile(r'^(\d{3,4})\D|year=(\d{3,4})')
+rePeriod = re.compile(r'period=([^,.]+)|([mM]\d+)')
+
+# text of a sentence ID: the part before the first . or , (PCEEC IDs with period= year=: before the first .)
+def textKey(id):
+    id = id.replace('?', '')   # question marks in PCEEC IDs
+    if rePCEEC.search(id):
+        return id.split('.', 1)[0]
+    return reTextKey.split(id, 1)[0]
+
+class Metadata:
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.texts = {}
+        self.unknown = set()
+        for row in readTable(fileName):
+            self.texts[sys.intern(row[0])] = tuple(sys.intern(v or 'NA') for v in row[1:])
+        sys.stderr.write('--- metadata of %d texts read from %s\n' % (len(self.texts), fileName))
+
+    # (year, period, genre, corpus) of the text of a sentence ID
+    def lookup(self, id):
+        key = textKey(id)
+        values = self.texts.get(key)
+        if values is None:
+            if key not in self.unknown:
+                self.unknown.add(key)
+                sys.stderr.write('--- text %s not in %s\n' % (key, self.fileName))
+            return missing
+        return values
+
+# rows of a metadata table: text and the values of columns (missing columns as '')
+def readTable(fileName):
+    with open(fileName, 'r', encoding='utf8') as inp:
+        head = inp.readline().rstrip('\n').split('\t')
+        positions = [head.index(c) if c in head else None for c in columns]
+        for line in inp:
+            row = line.rstrip('\n').split('\t')
+            if not row[0]:
+                continue
+            yield [row[0]] + [row[p] if p is not None and p < len(row) else '' for p in positions]
+
+# writes or updates the table with the texts of a psd or cod file, returns the number of new texts
+def buildTable(fileName, tableFile, corpus=''):
+    rows = {}
+    if os.path.isfile(tableFile):
+        rows = {row[0]: row for row in readTable(tableFile)}
+    sep = '/~*' if re.search(r'\.cod(\.gz|\.xz|\.zst)?$', fileName) else '\n\n'
+    filePeriod = rePeriod.search(re.sub(r'.*/', '', fileName))
+    corpus = corpus or re.sub(r'\..*', '', re.sub(r'.*/', '', fileName))
+    new = 0
+    for s in readRecords(fileName, sep, progress=True):
+        m = reID.search(s)
+        if not m:
+            continue
+        key = textKey(m.group(1))
+        if key in rows:
+            continue
+        mYear = reYear.search(m.group(1))
+        mPeriod = rePeriod.search(m.group(1)) or filePeriod
+        rows[key] = [key, next(g for g in mYear.groups() if g) if mYear else 'NA',
+                     next(g for g in mPeriod.groups() if g) if mPeriod else 'NA', 'NA', corpus]
+        new += 1
+    with open(tableFile, 'w', encoding='utf8') as out:
+        out.write('text\t%s\n' % '\t'.join(columns))
+        for key in sorted(rows):
+            out.write('\t'.join(v or 'NA' for v in rows[key]) + '\n')
+    sys.stderr.write('\n--- %d new texts, %d texts in %s\n' % (new, len(rows), tableFile))
+    return new
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# option --profile for penntools.py and penn-coding.py
+# - wall and CPU time per processing stage (exclusive: time of nested stages is not counted twice)
+# - counters (sentences, tokens, coded IPs, rows) and their rate per second
+# - peak memory, optional cProfile dump (--cprofile FILE)
+# When profiling is off, stage() returns a shared no-op context and countUp() returns at once.
+
+import sys
+import time
+import atexit
+from contextlib import nullcontext
+
+enabled = False
+stages = {}    # stage name: [wall, cpu, calls]
+counters = {}  # counter name: count
+stack = []     # open stages: [name, wall start, cpu start, wall of nested stages, cpu of nested stages]
+startWall = startCpu = 0.0
+noStage = nullcontext()
+profiler = None
+
+# switch profiling on, report on exit
+def startProfile(cprofileFile=''):
+    global enabled, startWall, startCpu, profiler
+    enabled = True
+    startWall = time.perf_counter()
+    startCpu = time.process_time()
+    if cprofileFile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    atexit.register(reportProfile, cprofileFile)
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+    def __enter__(self):
+        stack.append([self.name, time.perf_counter(), time.process_time(), 0.0, 0.0])
+    def __exit__(self, *exc):
+        name, w0, c0, childWall, childCpu = stack.pop()
+        wall = time.perf_counter() - w0
+        cpu = time.process_time() - c0
+        s = stages.setdefault(name, [0.0, 0.0, 0])
+        s[0] += wall - childWall
+        s[1] += cpu - childCpu
+        s[2] += 1
+        if stack:   # don't count this time again for the enclosing stage
+            stack[-1][3] += wall
+            stack[-1][4] += cpu
+        return False
+
+# usage:  with stage('parse'): ...
+def stage(name):
+    if not enabled:
+        return noStage
+    return Stage(name)
+
+# generator wrapper: time spent in the wrapped generator counts as stage name
+def timedIter(iterable, name='read'):
+    if not enabled:
+        yield from iterable
+        return
+    it = iter(iterable)
+    while True:
+        with Stage(name):
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+        yield item
+
+def countUp(name, n=1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + n
+
+# peak resident memory in MB (ru_maxrss is KB on Linux, bytes on macOS)
+def peakMemory():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def reportProfile(cprofileFile=''):
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(cprofileFile)
+    wall = time.perf_counter() - startWall
+    cpu = time.process_time() - startCpu
+    err = sys.stderr
+    err.write('\n--- profile ---------------------------------------------\n')
+    err.write('%-12s %10s %10s %10s %6s\n' % ('stage', 'wall(s)', 'cpu(s)', 'calls', 'wall%'))
+    for name, (w, c, n) in sorted(stages.items(), key=lambda x: -x[1][0]):
+        err.write('%-12s %10.3f %10.3f %10d %5.1f%%\n' % (name, w, c, n, w / wall * 100 if wall else 0))
+    other = wall - sum(s[0] for s in stages.values())
+    err.write('%-12s %10.3f\n' % ('(other)', other))
+    err.write('%-12s %10.3f %10.3f\n' % ('total', wall, cpu))
+    for name, n in counters.items():
+        err.write('%-12s %10d %10.1f/s\n' % (name, n, n / wall if wall else 0))
+    mem = peakMemory()
+    if mem is not None:
+        err.write('peak memory  %10.1f MB\n' % mem)
+    if profiler:
+        err.write('cProfile statistics written to %s (python -m pstats %s)\n' % (cprofileFile, cprofileFile))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# learned suffix rules for the pseudo-lemmatisation of penntools.py clean-lemmas (options --rules_train, --rules)
+# - training: for each verb form with a lemma (@l=), the part after the common prefix of form and lemma
+#   gives a rule form suffix -> lemma suffix, e.g. wente/wenden: te -> den (counted)
+# - the rules are stored in a suffix trie (reversed form suffixes), so that all rules matching the end
+#   of a word are found in one walk over the word, longest (most specific) suffix first
+# - candidates are looked up in the MED lemma list; fuzzy matching only runs if no candidate is found
+# Rule file: form suffix, lemma suffix, count (tab-delimited, sorted by count)
+
+import sys
+from collections import defaultdict
+
+minStem = 2   # characters of the form kept by a rule
+
+# rule (form suffix, lemma suffix) for a form and its lemma, None if they have no common prefix
+def rule(form, lemma):
+    p = 0
+    while p < len(form) and p < len(lemma) and form[p] == lemma[p]:
+        p += 1
+    if p == 0:
+        return None
+    return (form[p:], lemma[p:])
+
+# counts of the rules from (form, lemma) pairs
+def learnRules(pairs):
+    counts = defaultdict(int)
+    for form, lemma in pairs:
+        r = rule(form, lemma)
+        if r:
+            counts[r] += 1
+    return counts
+
+def writeRules(fileName, counts):
+    with open(fileName, 'w') as out:
+        for (formSuffix, lemmaSuffix), n in sorted(counts.items(), key=lambda x: (-x[1], x[0])):
+            out.write('%s\t%s\t%d\n' % (formSuffix, lemmaSuffix, n))
+
+# suffix trie: node = [rules, children], rules = list of (count, form suffix, lemma suffix), children by character
+def makeTrie(counts, minCount=1):
+    root = [[], {}]
+    for (formSuffix, lemmaSuffix), n in counts.items():
+        if n < minCount:
+            continue
+        node = root
+        for c in reversed(formSuffix):
+            node = node[1].setdefault(c, [[], {}])
+        node[0].append((n, formSuffix, lemmaSuffix))
+    return root
+
+def readRules(fileName, minCount=1):
+    counts = {}
+    with open(fileName, 'r') as inp:
+        for line in inp:
+            formSuffix, lemmaSuffix, n = line.rstrip('\n').split('\t')
+            counts[(formSuffix, lemmaSuffix)] = int(n)
+    trie = makeTrie(counts, minCount)
+    sys.stderr.write('--- %d suffix rules read from %s\n' % (sum(1 for n in counts.values() if n >= minCount), fileName))
+    return trie
+
+# generator: candidate lemmas for word, rules of longer suffixes first, then by count
+def candidates(trie, word):
+    found = []   # rules of each depth, shortest suffix first
+    node = trie
+    found.append(node[0])
+    for c in reversed(word[minStem:]):
+        node = node[1].get(c)
+        if node is None:
+            break
+        found.append(node[0])
+    seen = set()
+    for rules in reversed(found):
+        for n, formSuffix, lemmaSuffix in sorted(rules, reverse=True):
+            lemma = word[:len(word) - len(formSuffix)] + lemmaSuffix
+            if lemma not in seen:
+                seen.add(lemma)
+                yield lemma
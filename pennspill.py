@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# accumulators of penntools.py that can spill to disk (option --spill N, for lexicons and triples of several corpora)
+# - SpillDict: string keys with integer values (counts, first positions), combined by a function (add, min)
+#   when the dict has N keys, they are written as a sorted run; items() merges the runs and the keys
+#   in memory k-way (heapq.merge) and combines equal keys, in key order, reading each run once
+# - SpillList: lines in the order they were added, written as runs of N lines
+# - lexicon: keys word TAB tag TAB lemma with the position of their first occurrence,
+#   lexiconEntries() rebuilds the entries of writeLexicon (tags and lemmas in the order of the corpus)
+# N = 0: everything stays in memory. Runs are pickled with the state for --checkpoint (run names are numbered,
+# so that runs written after the checkpoint are overwritten after --resume).
+
+import os
+import heapq
+from operator import add
+from itertools import groupby
+
+maxRuns = 200   # runs merged at once (open files)
+
+def escape(s):
+    return s.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+def unescape(s):
+    if '\\' not in s:
+        return s
+    return s.replace('\\\\', '\x00').replace('\\t', '\t').replace('\\n', '\n').replace('\x00', '\\')
+
+class SpillDict:
+    def __init__(self, limit=0, combine=None, directory=None, name='dict'):
+        self.limit = limit
+        self.combine = combine or add   # module-level functions (pickled with --checkpoint)
+        self.directory = directory
+        self.name = name
+        self.data = {}
+        self.runs = []
+        self.nRuns = 0   # runs written (file names)
+        self.adds = 0   # calls of add (positions for the lexicon)
+
+    def add(self, key, value=1):
+        self.adds += 1
+        if key in self.data:
+            self.data[key] = self.combine(self.data[key], value)
+        else:
+            self.data[key] = value
+            if self.limit and len(self.data) >= self.limit:
+                self.spill()
+
+    def writeRun(self, items):
+        fileName = runName(self)
+        with open(fileName, 'w', encoding='utf8') as out:
+            for key, value in items:
+                out.write('%s\t%d\n' % (escape(key), value))
+        self.runs.append(fileName)
+
+    def spill(self):
+        self.writeRun(sorted(self.data.items()))
+        self.data = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    # generator: (key, value) in key order, equal keys of the runs and of memory combined
+    def items(self):
+        while len(self.runs) > maxRuns:   # merge the first runs into one
+            first = self.runs[:maxRuns]
+            self.runs = self.runs[maxRuns:]
+            self.writeRun(combined(heapq.merge(*[readRun(f) for f in first]), self.combine))
+            for f in first:
+                os.remove(f)
+        streams = [readRun(f) for f in self.runs]
+        streams.append(iter(sorted(self.data.items())))
+        yield from combined(heapq.merge(*streams), self.combine)
+
+    def close(self):
+        removeRuns(self)
+
+# file name of the next run of a SpillDict or SpillList
+def runName(acc):
+    if not acc.directory:
+        import tempfile
+        acc.directory = tempfile.mkdtemp(prefix='tmp-penntools-spill-')
+    os.makedirs(acc.directory, exist_ok=True)
+    acc.nRuns += 1
+    return os.path.join(acc.directory, '%s-%d' % (acc.name, acc.nRuns))
+
+# removes the runs, also those left by an interrupted run (--resume)
+def removeRuns(acc):
+    acc.runs = []
+    if not acc.directory or not os.path.isdir(acc.directory):
+        return
+    for f in os.listdir(acc.directory):
+        if f.startswith(acc.name + '-'):
+            os.remove(os.path.join(acc.directory, f))
+    if acc.directory and os.path.isdir(acc.directory) and not os.listdir(acc.directory):
+        os.rmdir(acc.directory)
+
+# generator: (key, value) of a run file
+def readRun(fileName):
+    with open(fileName, 'r', encoding='utf8') as inp:
+        for line in inp:
+            key, value = line.rstrip('\n').rsplit('\t', 1)
+            yield (unescape(key), int(value))
+
+# generator: sorted (key, value) with the values of equal keys combined
+def combined(items, combine):
+    lastKey = None
+    lastValue = None
+    for key, value in items:
+        if key == lastKey:
+            lastValue = combine(lastValue, value)
+            continue
+        if lastKey is not None:
+            yield (lastKey, lastValue)
+        lastKey, lastValue = key, value
+    if lastKey is not None:
+        yield (lastKey, lastValue)
+
+class SpillList:
+    def __init__(self, limit=0, directory=None, name='list'):
+        self.limit = limit
+        self.directory = directory
+        self.name = name
+        self.data = []
+        self.runs = []
+        self.nRuns = 0
+
+    def append(self, line):
+        self.data.append(line)
+        if self.limit and len(self.data) >= self.limit:
+            fileName = runName(self)
+            with open(fileName, 'w', encoding='utf8') as out:
+                for l in self.data:
+                    out.write(escape(l) + '\n')
+            self.runs.append(fileName)
+            self.data = []
+
+    def __iter__(self):
+        for fileName in self.runs:
+            with open(fileName, 'r', encoding='utf8') as inp:
+                for line in inp:
+                    yield unescape(line.rstrip('\n'))
+        yield from self.data
+
+    def close(self):
+        removeRuns(self)
+
+# lexicon key of a word with tag and lemma
+def lexiconKey(word, tag, lemma):
+    return '%s\t%s\t%s' % (word, tag, lemma)
+
+# generator: (word, [{tag: [lemma, ...]}, ...]) in word order, from a SpillDict of lexicon keys and first positions
+# - tags and lemmas in the order of their first occurrence; NA only if it was the first lemma of the tag
+def lexiconEntries(lexicon):
+    rows = (key.split('\t') + [first] for key, first in lexicon.items())
+    for word, group in groupby(rows, key=lambda r: r[0]):
+        tags = {}
+        for w, tag, lemma, first in group:
+            tags.setdefault(tag, []).append((first, lemma))
+        items = []
+        for tag, lemmas in sorted(tags.items(), key=lambda x: min(x[1])):
+            lemmas.sort()
+            items.append({tag: [lemma for i, (first, lemma) in enumerate(lemmas) if i == 0 or lemma != 'NA']})
+        yield (word, items)
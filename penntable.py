@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# table outputs of penn-coding.py besides the tab-delimited table
+# - SqliteRows (option --sqlite): typed table 'rows' with the columns of the table header,
+#   table 'texts' (text name, year) and 'meta' (source file, corpus, date)
+#     sqlite3 coding.db "SELECT lemma, dobj, count(*) FROM rows GROUP BY lemma, dobj"
+# - Aggregate (option -A/--aggregate): counts for combinations of columns while the rows are produced,
+#   written as pivot tables (last column of a combination spread over the table columns)
+#     penn-coding.py -A lemma,dobj,year -A ipType,clit,neg corpus.cod
+
+import sys
+import sqlite3
+import datetime
+from collections import defaultdict
+
+intColumns = {'nr', 'coord', 'clit', 'neg', 'year'}   # stored as INTEGER (if the value is numeric)
+indexColumns = ['lemma', 'pos', 'ipType', 'textid', 'text']
+batchSize = 50000   # rows per insert
+
+class SqliteRows:
+    def __init__(self, fileName, meta):
+        self.db = sqlite3.connect(fileName)
+        self.db.execute('PRAGMA synchronous = OFF')   # bulk load: the file is rebuilt on failure
+        self.db.execute('PRAGMA journal_mode = MEMORY')
+        for table in ('rows', 'texts', 'meta'):
+            self.db.execute('DROP TABLE IF EXISTS %s' % table)
+        self.db.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        meta['created'] = str(datetime.datetime.now())
+        self.db.executemany('INSERT INTO meta VALUES (?, ?)', sorted(meta.items()))
+        self.columns = []
+        self.batch = []
+        self.texts = {}   # text name: year
+        self.n = 0
+
+    # create the table from the column header
+    def header(self, columns):
+        self.columns = columns + ['text']   # text name (ID without sentence number), joins with texts
+        self.textid = columns.index('textid')
+        self.year = columns.index('year') if 'year' in columns else None
+        cols = ['"%s" %s' % (c, 'INTEGER' if c in intColumns else 'TEXT') for c in self.columns]
+        self.db.execute('CREATE TABLE rows (%s)' % ', '.join(cols))
+        self.insert = 'INSERT INTO rows VALUES (%s)' % ', '.join('?' * len(self.columns))
+
+    def add(self, row):
+        text = row[self.textid].split(',', 1)[0]
+        if text not in self.texts:
+            self.texts[text] = row[self.year] if self.year is not None else None
+        row = [int(v) if c in intColumns and v.lstrip('-').isdigit() else v for c, v in zip(self.columns, row)]
+        row.append(text)
+        self.batch.append(row)
+        if len(self.batch) >= batchSize:
+            self.flush()
+
+    def flush(self):
+        self.db.executemany(self.insert, self.batch)
+        self.n += len(self.batch)
+        self.batch = []
+
+    # write remaining rows and texts, build the indexes
+    def close(self):
+        if self.columns:
+            self.flush()
+            self.db.execute('CREATE TABLE texts (text TEXT PRIMARY KEY, year INTEGER)')
+            self.db.executemany('INSERT INTO texts VALUES (?, ?)',
+                                [(t, int(y) if y and y.isdigit() else None) for t, y in self.texts.items()])
+            for c in indexColumns:
+                self.db.execute('CREATE INDEX "rows_%s" ON rows ("%s")' % (c, c))
+        self.db.commit()
+        self.db.close()
+        sys.stderr.write('--- %d rows, %d texts written to sqlite database\n' % (self.n, len(self.texts)))
+
+class Aggregate:
+    def __init__(self, specs):
+        self.specs = [[c.strip() for c in spec.split(',')] for spec in specs]   # e.g. ['lemma', 'dobj', 'year']
+        self.codes = {}    # column index: {value: code}
+        self.values = {}   # column index: [value of code]
+        self.counts = [defaultdict(int) for spec in self.specs]   # tuple of codes: count
+        self.indexes = []
+        self.n = 0
+
+    def header(self, columns):
+        for spec in self.specs:
+            unknown = [c for c in spec if c not in columns]
+            if unknown:
+                sys.exit('  error option --aggregate: unknown column %s (columns: %s)' % (', '.join(unknown), ', '.join(columns)))
+            self.indexes.append([columns.index(c) for c in spec])
+        for idx in self.indexes:
+            for i in idx:
+                self.codes.setdefault(i, {})
+                self.values.setdefault(i, [])
+
+    def code(self, i, value):
+        codes = self.codes[i]
+        c = codes.get(value)
+        if c is None:
+            c = codes[value] = len(codes)
+            self.values[i].append(value)
+        return c
+
+    def add(self, row):
+        self.n += 1
+        for idx, counts in zip(self.indexes, self.counts):
+            counts[tuple([self.code(i, row[i]) for i in idx])] += 1
+
+    # write one pivot table per combination, rows sorted by frequency
+    def write(self, out):
+        for spec, idx, counts in zip(self.specs, self.indexes, self.counts):
+            out.write('# %s (%d rows)\n' % (' x '.join(spec), self.n))
+            values = [self.values[i] for i in idx]
+            if len(spec) == 1:
+                out.write('%s\tcount\n' % spec[0])
+                for key, n in sorted(counts.items(), key=lambda x: -x[1]):
+                    out.write('%s\t%d\n' % (values[0][key[0]], n))
+                out.write('\n')
+                continue
+            cols = sorted({key[-1] for key in counts}, key=lambda c: valueOrder(values[-1][c]))
+            pivot = defaultdict(dict)   # codes of the row columns: {code of the last column: count}
+            for key, n in counts.items():
+                pivot[key[:-1]][key[-1]] = n
+            out.write('\t'.join(spec[:-1] + [values[-1][c] for c in cols] + ['total']) + '\n')
+            for rowKey, cells in sorted(pivot.items(), key=lambda x: -sum(x[1].values())):
+                labels = [values[j][c] for j, c in enumerate(rowKey)]
+                out.write('\t'.join(labels + [str(cells.get(c, 0)) for c in cols] + [str(sum(cells.values()))]) + '\n')
+            out.write('\n')
+
+# numbers in numeric order, before the other values
+def valueOrder(v):
+    return (0, int(v), '') if v.isdigit() else (1, 0, v)
@@ -8,6 +8,9 @@
 #### RNNTagger must be a sister folder
 ####
 #### command line: for i in *.psd ; do penntools.sh $i > /dev/null ;done
+####
+#### tagging cache: set TAG_CACHE to a cache file (e.g. TAG_CACHE=~/rnn-tags.cache penntools.sh ...)
+#### sentences tagged in an earlier run (same words, same tagger script) are not tagged again
 
 file=$1
 tagger=$2
@@ -39,6 +42,10 @@ input_file=`basename $1`
 cd `dirname $1`
 corpus_dir=`pwd` # "220501-mcvf-ppchf-lgermed-psd"  # where the input psd files are
 output_dir=rnn_output
+cache_opts=""
+if [ -n "$TAG_CACHE" ]
+then cache_opts="--tag_cache $TAG_CACHE --tagger `basename $tagger`"
+fi
 
 echo "Extracting words (terminal nodes) from $file"
 # This will produce
@@ -47,20 +54,23 @@ echo "Extracting words (terminal nodes) from $file"
 # - one-word-per line format   to stdout
 cd $corpus_dir
 #penntools.py -c 1 $file > tmp-${file%.*}.wpl
-${python} -c 1 "$input_file" > tmp-$input_file.wpl
+${python} extract -c 1 $cache_opts "$input_file" > tmp-$input_file.wpl
 
 # Run tagger (any tagger, output needs to be one word per line, tab-delimited  (word-pos-lemma), e.g.
 echo "Tagging and lemmatizing: $input_file"
 cd $tagger_dir
-./my-rnn-of.sh ${corpus_dir}/tmp-penntools-tagme > ${corpus_dir}/tmp-tagged
+if [ -s ${corpus_dir}/tmp-penntools-tagme ]
+then ./my-rnn-of.sh ${corpus_dir}/tmp-penntools-tagme > ${corpus_dir}/tmp-tagged
+else echo "All sentences found in tagging cache"; : > ${corpus_dir}/tmp-tagged
+fi
 
 cd $corpus_dir
 if [ ! -d $output_dir ]; then echo "creating output folder: $output_dir"; mkdir $output_dir; fi
-# Merge node number file with tagger output. Creates 4 columns, e.g.: #14 ad VERcjg avoir
+# Merge tagger output with psd file: the tagger tokens are aligned to the node numbers of tmp-penntools-nodes
+# (tokens split, merged or dropped by the tagger only affect these nodes, see tmp-penntools-align)
+# and inserted at the byte offsets of the terminal nodes stored in tmp-penntools-index
 echo "Copying tagger output to psd file"
-paste tmp-penntools-nodes tmp-tagged |cut -f1,3- > tmp-penntools-merge 
-# Merge annotation with psd file 
-${python} -m tmp-penntools-merge tmp-penntools-$input_file > $output_dir/$input_file
+${python} merge tmp-tagged --align $cache_opts -o $output_dir/$input_file "$input_file"   # compressed if .gz .xz .zst
 # cleanup
 rm tmp-*
 echo "Finished writing $corpus_dir/$output_dir/$input_file"
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+__author__ = "Achim Stein"
+__version__ = "1.0"
+__email__ = "achim.stein@ling.uni-stuttgart.de"
+__status__ = "19.10.26"
+__license__ = "GPL"
+
+# corpus validation before long runs (penntools.py validate, see README.md)
+# - psd and cod files, records checked on a process pool (-j):
+#     brackets      unbalanced brackets (position of the first error)
+#     id            records with a tree but without (ID ...), IDs used by several records
+#     annotation    malformed @x= chains in terminals (key without value, empty value, repeated key)
+#     tagger        bracket characters < > [ ] inside annotation values (tagger output)
+# - other files are merge files (tmp-penntools-merge, 4 columns), checked with the node index (--index):
+#     merge         lines without 4 columns, node numbers missing or not increasing
+#     tagger        brackets < > ( ) in tags or lemmas
+#     nodes         node numbers of the index missing in the merge file (gaps); nodes annotated from
+#                   the tagging cache or the pre-tagging lexicon (tmp-penntools-cached, merged by -m as well) count
+# - report: JSON with file, byte offset, ID and message of each problem, counts by kind
+#   exit status 1 if a problem was found, so that scripts can stop before the run
+
+import sys
+import os
+import re
+import json
+from collections import Counter
+from pennio import openFile, readRecords, byteOffset
+
+maxReported = 100000   # problems listed in the report (all are counted)
+
+reTerminal = re.compile(r'\(([^\s()]+) ([^\s()]+)\)')
+reID = re.compile(r'\(ID ([^\)\(]+)\)')
+reKey = re.compile(r'^[A-Za-z]+$')
+reTaggerBracket = re.compile(r'[<>\[\]]')
+reCorpusFile = re.compile(r'\.(psd|cod)(\.gz|\.xz|\.zst)?$')
+
+# files of the corpus: files given, or psd and cod files of a folder (sorted)
+def corpusFiles(path):
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if reCorpusFile.search(f))
+    return [path]
+
+def problem(kind, offset, id, message):
+    return {'kind': kind, 'offset': offset, 'id': id, 'message': message}
+
+# returns the problems of an annotated terminal word
+def annotationProblems(word):
+    w = re.sub(r'@([@\)]|$)', r'++\1', word)   # amalgamated forms, e.g. e@ @l (see replaceAmalgamated)
+    w = re.sub(r'^@', r'++', w)
+    parts = w.split('@')
+    problems = []
+    keys = set()
+    for a in parts[1:]:
+        key, sep, value = a.partition('=')
+        if not sep or not reKey.match(key):
+            problems.append(('annotation', 'malformed annotation @%s in %s' % (a, word)))
+            continue
+        if value == '':
+            problems.append(('annotation', 'empty value @%s= in %s' % (key, word)))
+        if key in keys:
+            problems.append(('annotation', 'repeated @%s= in %s' % (key, word)))
+        keys.add(key)
+        if reTaggerBracket.search(value):
+            problems.append(('tagger', 'bracket in @%s=%s' % (key, value)))
+    return problems
+
+# problems of one record: list of dicts, and its ID (or None)
+def checkRecord(offset, s):
+    tree = s.split('*~/', 1)[1] if '*~/' in s else s   # cod: only the tree
+    base = offset + byteOffset(s, len(s) - len(tree))
+    problems = []
+    mID = reID.search(tree)
+    id = mID.group(1) if mID else None
+    depth = 0
+    for i, c in enumerate(tree):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth < 0:
+                problems.append(problem('brackets', base + byteOffset(tree, i), id, 'closing bracket without opening bracket'))
+                break
+    if depth > 0:
+        problems.append(problem('brackets', base + byteOffset(tree, len(tree.rstrip())), id, '%d brackets not closed' % depth))
+    if not id and '))' in tree and not re.search(r'^\s*\( \(CODE', tree):
+        problems.append(problem('id', base, None, 'record without ID'))
+    for m in reTerminal.finditer(tree):
+        if '@' in m.group(2):
+            for kind, message in annotationProblems(m.group(2)):
+                problems.append(problem(kind, base + byteOffset(tree, m.start(2)), id, message))
+    return problems, id
+
+# worker: problems and IDs of a batch of records
+def checkBatch(batch):
+    result = []
+    for offset, s in batch:
+        problems, id = checkRecord(offset, s)
+        result.append((offset, id, problems))
+    return result
+
+# generator: batches of (offset, record)
+def batches(fileName, sep, size=2000):
+    batch = []
+    for offset, s in readRecords(fileName, sep, offsets=True, progress=True):
+        batch.append((offset, s))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# checks a psd or cod file, returns the problems (with file name) and the number of records
+def checkFile(fileName, pool, seenIDs):
+    sep = '/~*' if re.search(r'\.cod(\.gz|\.xz|\.zst)?$', fileName) else '\n\n'
+    problems = []
+    n = 0
+    results = pool.imap(checkBatch, batches(fileName, sep)) if pool else map(checkBatch, batches(fileName, sep))
+    for result in results:
+        for offset, id, found in result:
+            n += 1
+            problems.extend(found)
+            if id:
+                if id in seenIDs:
+                    problems.append(problem('id', offset, id, 'duplicate ID, first in %s at offset %d' % seenIDs[id]))
+                else:
+                    seenIDs[id] = (fileName, offset)
+    for p in problems:
+        p['file'] = fileName
+    return problems, n
+
+# checks a merge file (node number, word, tag, lemma) against the node index, returns the problems and the number of lines
+def checkMerge(fileName, indexFile, cachedFile=''):
+    problems = []
+    numbers = set()
+    n = 0
+    last = -1
+    offset = 0
+    with openFile(fileName, 'rb') as inp:
+        for line in inp:
+            row = line.decode('utf8').rstrip('\n').split('\t')
+            if any(row):
+                n += 1
+                if len(row) != 4:
+                    problems.append(problem('merge', offset, None, 'line with %d columns: %s' % (len(row), '\t'.join(row))))
+                if row[0].startswith('#') and row[0][1:].isdigit():
+                    nr = int(row[0][1:])
+                    if nr <= last:
+                        problems.append(problem('merge', offset, None, 'node number %s after #%d' % (row[0], last)))
+                    last = nr
+                    numbers.add(row[0])
+                else:
+                    problems.append(problem('merge', offset, None, 'no node number: %s' % row[0]))
+                if any(re.search(r'[<>\(\)]', x) for x in row[2:4]):
+                    problems.append(problem('tagger', offset, None, 'bracket in tagger output: %s' % '\t'.join(row[1:])))
+            offset += len(line)
+    if cachedFile and os.path.isfile(cachedFile) and os.path.abspath(cachedFile) != os.path.abspath(fileName):
+        with openFile(cachedFile, 'r') as cached:   # --tag_cache, --pretag: nodes not sent to the tagger
+            for line in cached:
+                numbers.add(line.split('\t', 1)[0])
+    if indexFile and os.path.isfile(indexFile):
+        offset = 0
+        with open(indexFile, 'rb') as index:
+            for line in index:
+                nr = line.decode('utf8').split('\t', 1)[0]
+                if nr not in numbers:
+                    problems.append(problem('nodes', offset, None, 'node %s of %s missing in the merge file' % (nr, indexFile)))
+                offset += len(line)
+    for p in problems:
+        p['file'] = fileName
+    return problems, n
+
+# validate files or folders (psd, cod or merge files), write the JSON report, returns the number of problems
+def validate(paths, jobs=1, reportFile='', indexFile='', cachedFile=''):
+    files = [f for path in paths for f in corpusFiles(path)]
+    problems = []
+    records = 0
+    pool = None
+    if jobs > 1:
+        from multiprocessing import Pool
+        pool = Pool(jobs)
+    seenIDs = {}   # IDs of all corpus files: (file, offset) of the first record
+    try:
+        for fileName in files:
+            if reCorpusFile.search(fileName):
+                found, n = checkFile(fileName, pool, seenIDs)
+            else:
+                found, n = checkMerge(fileName, indexFile, cachedFile)
+            problems.extend(found)
+            records += n
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    counts = Counter(p['kind'] for p in problems)
+    report = {'files': files, 'records': records, 'problems': len(problems), 'counts': dict(sorted(counts.items())),
+              'list': problems[:maxReported]}
+    if reportFile:
+        with open(reportFile, 'w') as out:
+            json.dump(report, out, indent=1, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=1, ensure_ascii=False)
+        sys.stdout.write('\n')
+    sys.stderr.write('--- %d files, %d records: %d problems %s\n' % (len(files), records, len(problems),
+                     ' '.join('%s=%d' % kv for kv in sorted(counts.items()))))
+    return len(problems)